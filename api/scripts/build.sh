@@ -62,6 +62,35 @@ build_layer() {
     echo -e "${GREEN}✅ ${layer_name} layer built successfully${NC}"
 }
 
+# Function to quantize the embedding model to INT8 (dynamic, weights only)
+quantize_model() {
+    local model_fp32="${EMBEDDING_MODEL_FP32:-}"
+
+    if [[ -z "${model_fp32}" ]]; then
+        echo -e "${YELLOW}⏭️  EMBEDDING_MODEL_FP32 not set, skipping model quantization${NC}"
+        return
+    fi
+
+    local model_int8="${model_fp32%.onnx}_int8.onnx"
+
+    echo -e "${YELLOW}🔨 Quantizing embedding model to INT8...${NC}"
+
+    # Use the onnxruntime from the freshly built ML layer
+    PYTHONPATH="${LAYERS_DIR}/ml/python" python3.9 - "${model_fp32}" "${model_int8}" <<'EOF'
+import sys
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+quantize_dynamic(
+    sys.argv[1],
+    sys.argv[2],
+    weight_type=QuantType.QInt8,
+    op_types_to_quantize=["MatMul", "Attention", "Gemm"],
+)
+EOF
+
+    echo -e "${GREEN}✅ INT8 model written to ${model_int8}${NC}"
+}
+
 # Function to check if uv is installed
 check_uv() {
     if ! command -v uv &> /dev/null; then
@@ -101,6 +130,9 @@ main() {
     # Layer 3: Heavy ML dependencies
     build_layer "ml"
     
+    # Quantize the embedding model with the ML layer's onnxruntime
+    quantize_model
+    
     # Package source code
     package_source
     
@@ -4,46 +4,116 @@ Embeddings Lambda Handler
 Heavy ML operations for product embedding computation
 This is where you integrate your existing embedding code
 
-Dependencies: onnxruntime, opencv, hdbscan, faiss (ML layer)
+Dependencies: onnxruntime, opencv, faiss (ML layer, imported lazily)
 Configuration: High memory (3GB), long timeout (15min)
 """
 
-import json
+import importlib
+import io
 import logging
 import os
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
 import numpy as np
-import boto3
+import zstandard as zstd
 from botocore.exceptions import ClientError
 
-# Heavy ML imports - only in this Lambda
-try:
-    import onnxruntime as ort
-    import cv2
-    import hdbscan
-    import faiss
-except ImportError as e:
-    logging.error(f"Heavy ML dependencies not available: {e}")
-    # This Lambda won't work without these dependencies
-
-from shared.utils import (
+from src.shared.utils import (
+    s3_client,
     success_response,
     error_response,
     parse_json_body,
-    upload_to_s3,
+    get_path_parameter,
+    upload_fileobj_to_s3,
     download_from_s3,
     AWSConfig,
 )
-from shared.models import DBProductEmbedding, Product
-from shared.database import EmbeddingRepository
+from src.shared.models import database as db
+from src.shared.database import repository
 
 
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get("LOG_LEVEL", "WARNING"))
+
+# Image downloads are I/O bound, so fetch them concurrently; the pool is
+# reused across warm invocations
+_image_download_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("IMG_DL_CONCURRENCY", "16"))
+)
+
+# Leading bytes of an npz (zip) archive and of a zstd frame
+NPZ_MAGIC = b"PK\x03\x04"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# S3 object (in the similarity bucket) whose ETag versions the product catalog
+CATALOG_KEY = os.environ.get("CATALOG_KEY", "catalog/products.json")
+
+# How long a warm catalog matrix is trusted before its ETag is checked again
+CATALOG_RECHECK_SECONDS = float(os.environ.get("CATALOG_RECHECK_SECONDS", "60"))
+
+# Catalogs up to this size are ranked with NumPy instead of a FAISS index
+FAISS_MIN_CATALOG_SIZE = int(os.environ.get("FAISS_MIN_CATALOG_SIZE", "50000"))
+
+# Maximum number of images per model run
+MAX_IMG_BATCH = int(os.environ.get("MAX_IMG_BATCH", "8"))
+
+# Model input size and ImageNet RGB normalization, shaped for (N, H, W, 3)
+IMG_SIZE = 224
+IMG_MEAN = np.array([123.675, 116.28, 103.53], dtype=np.float32).reshape(1, 1, 1, 3)
+IMG_INV_STD = (1.0 / np.array([58.395, 57.12, 57.375], dtype=np.float32)).reshape(
+    1, 1, 1, 3
+)
+
+
+def _lazy_import(name: str) -> Any:
+    """
+    Import a heavy ML dependency (ML layer) on first use
+
+    Keeps onnxruntime, cv2 and faiss off the cold-start path of requests
+    that never touch them; repeat calls hit the sys.modules cache.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        logger.error("Heavy ML dependency %s not available: %s", name, e)
+        raise
+
+
+def _cpu_supports_vnni() -> bool:
+    """Check whether the CPU has AVX-512 VNNI or AVX-VNNI instructions"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            cpuinfo = f.read()
+    except OSError:
+        return False
+    return "avx512_vnni" in cpuinfo or "avx_vnni" in cpuinfo
+
+
+def quantize_embedding(vector: np.ndarray) -> Tuple[bytes, float]:
+    """Quantize an embedding to int8 bytes with a symmetric per-vector scale"""
+    scale = float(np.abs(vector).max()) / 127.0
+    if scale == 0.0:
+        return np.zeros(len(vector), dtype=np.int8).tobytes(), 0.0
+    quantized = np.round(vector / scale).clip(-127, 127).astype(np.int8)
+    return quantized.tobytes(), scale
 
-# AWS clients
-s3_client = boto3.client("s3")
+
+def decode_embedding(embedding: db.Embedding) -> np.ndarray:
+    """Restore a float32 embedding from its stored bytes without list round-trips"""
+    vector = np.frombuffer(embedding.vector, dtype=embedding.dtype)
+    if vector.dtype == np.float32:
+        return vector  # Zero-copy view over the stored bytes
+    return np.multiply(vector, embedding.scale, dtype=np.float32)
+
+
+def similarity_records(ids: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+    """Build API similarity records from parallel id/score arrays"""
+    return [
+        {"product_id": product_id, "similarity_score": score}
+        for product_id, score in zip(ids.tolist(), scores.astype(np.float64).tolist())
+    ]
 
 
 class EmbeddingProcessor:
@@ -60,25 +130,91 @@ class EmbeddingProcessor:
 
     def __init__(self):
         self.model_session = None
+        self.input_name: Optional[str] = None
+        self.output_name: Optional[str] = None
+        self._output_buffer: Optional[np.ndarray] = None
+        self._io_binding: Optional[Any] = None
         self.similarity_bucket = AWSConfig.get_similarity_bucket()
+        self.images_bucket = AWSConfig.get_images_bucket()
         self.model_version = "v1.0"  # Update with your model version
-        self._initialize_model()
+        self._catalog_ids = np.empty(0, dtype=str)
+        self._catalog_matrix: Optional[np.ndarray] = None
+        self._catalog_etag: Optional[str] = None
+        self._catalog_checked_at = 0.0
+        self._faiss_index: Optional[Any] = None
+        self._zstd_compressor = zstd.ZstdCompressor(level=3, threads=-1)
+        self._zstd_decompressor = zstd.ZstdDecompressor()
+        self._model_initialized = False
 
     def _initialize_model(self):
         """
         Initialize your ONNX model for embedding computation
 
         *** REPLACE WITH YOUR MODEL INITIALIZATION ***
+
+        Called lazily on the first embedding computation so that read-only
+        requests never import onnxruntime.
         """
+        if self._model_initialized:
+            return
+
         try:
-            # TODO: Replace with your actual model path/initialization
-            # Example:
-            # model_path = '/opt/ml/model/your_embedding_model.onnx'
-            # self.model_session = ort.InferenceSession(model_path)
+            # TODO: Replace with your actual model paths
+            # Example: '/opt/ml/model/your_embedding_model.onnx'
+            model_path = os.environ.get("EMBEDDING_MODEL_PATH")
+            int8_model_path = os.environ.get("EMBEDDING_MODEL_INT8_PATH")
+
+            # INT8 kernels are only faster than FP32 on CPUs with VNNI
+            vnni = _cpu_supports_vnni()
+            if int8_model_path and (vnni or not model_path):
+                model_path = int8_model_path
+            logger.info("CPU VNNI support: %s, selected model: %s", vnni, model_path)
+
+            if not model_path:
+                logger.info("Embedding model initialized (placeholder)")
+                self._model_initialized = True
+                return
+
+            # Avoid OpenMP thread oversubscription on Lambda's shared vCPUs for
+            # batch-1 inference; must be set before onnxruntime is imported
+            os.environ.setdefault("OMP_NUM_THREADS", "1")
+            os.environ.setdefault("OMP_WAIT_POLICY", "PASSIVE")
+            ort = _lazy_import("onnxruntime")
+            sess_options = ort.SessionOptions()
+            sess_options.graph_optimization_level = (
+                ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            )
+            sess_options.intra_op_num_threads = int(
+                os.environ.get("ORT_INTRA_OP_THREADS", min(4, os.cpu_count() or 1))
+            )
+            sess_options.inter_op_num_threads = 1
+            sess_options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+            self.model_session = ort.InferenceSession(
+                model_path,
+                sess_options=sess_options,
+                providers=["CPUExecutionProvider"],
+            )
+
+            self.input_name = self.model_session.get_inputs()[0].name
+
+            # Bind outputs to a reusable (MAX_IMG_BATCH, D) buffer
+            output = self.model_session.get_outputs()[0]
+            dim = output.shape[-1] if isinstance(output.shape[-1], int) else 512
+            self.output_name = output.name
+            self._output_buffer = np.empty((MAX_IMG_BATCH, dim), dtype=np.float32)
+            self._io_binding = self.model_session.io_binding()
+            self._model_initialized = True
 
-            logger.info("Embedding model initialized (placeholder)")
+            logger.info(
+                "Embedding model initialized from %s (intra_op_threads=%s, "
+                "inter_op_threads=1, OMP_NUM_THREADS=%s, OMP_WAIT_POLICY=%s)",
+                model_path,
+                sess_options.intra_op_num_threads,
+                os.environ["OMP_NUM_THREADS"],
+                os.environ["OMP_WAIT_POLICY"],
+            )
         except Exception as e:
-            logger.error(f"Failed to initialize embedding model: {e}")
+            logger.error("Failed to initialize embedding model: %s", e)
             raise
 
     def compute_product_embedding(
@@ -90,7 +226,7 @@ class EmbeddingProcessor:
         *** INTEGRATE YOUR EXISTING EMBEDDING COMPUTATION HERE ***
 
         Args:
-            product_data: Product data including image URLs from product.images
+            product_data: Product data including its Image record ids in images
 
         Returns:
             numpy array of embedding vector or None if failed
@@ -100,33 +236,92 @@ class EmbeddingProcessor:
             images = product_data.get("images", [])
 
             logger.info(
-                f"Computing embedding for product {product_id} with {len(images)} images"
+                "Computing embedding for product %s with %s images",
+                product_id,
+                len(images),
             )
 
             if not images:
-                logger.warning(f"No images found for product {product_id}")
+                logger.warning("No images found for product %s", product_id)
                 return None
 
-            # *** REPLACE THIS SECTION WITH YOUR ACTUAL CODE ***
+            self._initialize_model()
+            if self.model_session is None:
+                # Placeholder: return random vector until a model is configured
+                embedding_vector = np.random.random(512).astype(np.float32)
+            else:
+                # Run all of the product's images through the model as one
+                # (num_images, 3, H, W) batch and pool their embeddings
+                batch = self._preprocess_images(product_id, images)
+                embedding_vector = self._run_model(batch)
+
+            logger.info("Successfully computed embedding for product %s", product_id)
+            return embedding_vector
+
+        except Exception as e:
+            logger.error(
+                "Failed to compute embedding for product %s: %s", product_id, e
+            )
+            return None
+
+    def _download_images(self, product_id: str, images: List[str]) -> List[bytes]:
+        """Resolve a product's Image records and download their files from S3"""
+        records = repository.Image.read_batch(images, product_id)
+        if len(records) != len(images):
+            raise LookupError(f"Images for product {product_id} not found")
+        return list(
+            _image_download_executor.map(
+                lambda record: download_from_s3(self.images_bucket, record.image),
+                records,
+            )
+        )
 
-            # Your embedding computation would typically:
-            # 1. Download images from S3 using the image URLs/IDs
-            # 2. Preprocess images (resize, normalize, etc.)
-            # 3. Run through your computer vision pipeline
-            # 4. Extract features using your ONNX model
-            # 5. Return the embedding vector
+    def _preprocess_images(self, product_id: str, images: List[str]) -> np.ndarray:
+        """
+        Download and preprocess product images into a model input batch
 
-            # Placeholder: return random vector for now
-            embedding_vector = np.random.random(512).astype(np.float32)
+        Images are decoded and resized individually, then normalized and
+        transposed as one stacked (N, H, W, 3) array.
 
-            # *** END REPLACEMENT SECTION ***
+        Returns:
+            C-contiguous float32 array of shape (num_images, 3, H, W)
+        """
+        cv2 = _lazy_import("cv2")
+
+        decoded = []
+        for data in self._download_images(product_id, images):
+            img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                raise ValueError("Failed to decode product image")
+            decoded.append(
+                cv2.resize(img, (IMG_SIZE, IMG_SIZE), interpolation=cv2.INTER_AREA)
+            )
 
-            logger.info(f"Successfully computed embedding for product {product_id}")
-            return embedding_vector
+        batch = np.stack(decoded)[..., ::-1]  # BGR -> RGB
+        batch = (batch.astype(np.float32) - IMG_MEAN) * IMG_INV_STD
+        return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+    def _run_model(self, batch: np.ndarray) -> np.ndarray:
+        """Run a batch of images through the model and mean-pool the outputs"""
+        pooled = np.zeros(self._output_buffer.shape[1], dtype=np.float32)
+        for start in range(0, len(batch), MAX_IMG_BATCH):
+            chunk = np.ascontiguousarray(batch[start : start + MAX_IMG_BATCH])
+
+            # Write outputs into the preallocated buffer instead of a new array
+            output = self._output_buffer[: len(chunk)]
+            self._io_binding.bind_cpu_input(self.input_name, chunk)
+            self._io_binding.bind_output(
+                self.output_name,
+                "cpu",
+                0,
+                np.float32,
+                output.shape,
+                output.ctypes.data,
+            )
+            self.model_session.run_with_iobinding(self._io_binding)
+            pooled += output.sum(axis=0)
 
-        except Exception as e:
-            logger.error(f"Failed to compute embedding for product {product_id}: {e}")
-            return None
+        return pooled / len(batch)
 
     def compute_similarity_matrix(
         self, reference_product_id: str, reference_product_data: Dict[str, Any]
@@ -149,58 +344,151 @@ class EmbeddingProcessor:
             if ref_embedding is None:
                 raise ValueError("Failed to compute reference embedding")
 
-            # *** INTEGRATE WITH YOUR PRODUCT CATALOG ***
-
-            # You'll need to:
-            # 1. Get all products from your product catalog/database
-            # 2. For each product, get or compute its embedding
-            # 3. Compute similarity scores
-
-            # TODO: Replace with actual product catalog integration
-            all_products = self._get_all_products_from_catalog()
-
-            similarities = []
-
-            for product in all_products:
-                if product["id"] == reference_product_id:
-                    continue  # Skip self
-
-                # Get or compute embedding for this product
-                product_embedding = self._get_or_compute_embedding(
-                    product["id"], product
-                )
-                if product_embedding is None:
-                    continue
-
-                # Compute cosine similarity
-                similarity = self._cosine_similarity(ref_embedding, product_embedding)
-                similarities.append(
-                    {"product_id": product["id"], "similarity_score": float(similarity)}
-                )
-
-            # Sort by similarity (highest first)
-            similarities.sort(key=lambda x: x["similarity_score"], reverse=True)
+            # Score and rank the whole catalog (highest similarity first),
+            # keeping ids and scores as parallel arrays
+            product_ids, indices, scores = self._rank_catalog(ref_embedding)
+            ids = product_ids[indices]
+            keep = ids != reference_product_id  # Skip self
+            ids, scores = ids[keep], scores[keep]
 
             # Store in S3 as compressed numpy file
-            s3_key = self._store_similarity_matrix(reference_product_id, similarities)
+            s3_key = self._store_similarity_matrix(reference_product_id, ids, scores)
 
             result = {
                 "reference_product_id": reference_product_id,
-                "similarities_computed": len(similarities),
-                "top_similar": similarities[:10] if similarities else [],
+                "similarities_computed": len(ids),
+                "top_similar": similarity_records(ids[:10], scores[:10]),
                 "s3_key": s3_key,
                 "model_version": self.model_version,
             }
 
             logger.info(
-                f"Computed similarity matrix for {reference_product_id}: {len(similarities)} products"
+                "Computed similarity matrix for %s: %s products",
+                reference_product_id,
+                len(ids),
             )
             return result
 
         except Exception as e:
-            logger.error(f"Failed to compute similarity matrix: {e}")
+            logger.error("Failed to compute similarity matrix: %s", e)
             raise
 
+    def _get_catalog_matrix(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get catalog product IDs with their L2-normalized embeddings
+
+        Embeddings are stacked into a contiguous (N, D) float32 matrix so
+        they can be searched by inner product. The matrix is cached on the
+        processor across warm invocations and rebuilt only when the ETag of
+        the catalog object in S3 changes; the ETag is checked at most once
+        every CATALOG_RECHECK_SECONDS. Without a catalog object there is no
+        version to compare, so the matrix is simply rebuilt on that interval
+        to pick up newly stored embeddings and products.
+        """
+        now = time.monotonic()
+        if (
+            self._catalog_matrix is None
+            or now - self._catalog_checked_at >= CATALOG_RECHECK_SECONDS
+        ):
+            catalog_etag = self._get_catalog_etag()
+            self._catalog_checked_at = now
+            if catalog_etag is None or catalog_etag != self._catalog_etag:
+                self._catalog_matrix = None
+                self._faiss_index = None
+
+        if self._catalog_matrix is None:
+            product_ids = []
+            vectors = []
+            computed = []
+
+            # Fetch every stored embedding for this model in one query
+            stored = {
+                embedding.id: embedding
+                for embedding in repository.Embedding.list_by_model(self.model_version)
+            }
+
+            # *** INTEGRATE WITH YOUR PRODUCT CATALOG ***
+            # TODO: Replace with actual product catalog integration
+            for product in self._get_all_products_from_catalog():
+                if product["id"] in stored:
+                    product_embedding = decode_embedding(stored[product["id"]])
+                else:
+                    product_embedding = self.compute_product_embedding(product)
+                    if product_embedding is not None:
+                        computed.append(
+                            self._to_db_embedding(product["id"], product_embedding)
+                        )
+                if product_embedding is None:
+                    continue
+                product_ids.append(product["id"])
+                vectors.append(product_embedding)
+
+            # Store newly computed embeddings in one batch write
+            if computed and not repository.Embedding.create_batch(
+                computed, self.model_version
+            ):
+                logger.warning("Failed to store %s catalog embeddings", len(computed))
+
+            if vectors:
+                matrix = np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+                matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+            else:
+                matrix = np.empty((0, 0), dtype=np.float32)
+
+            self._catalog_ids = np.array(product_ids, dtype=str)
+            self._catalog_matrix = matrix
+            self._catalog_etag = catalog_etag
+
+        return self._catalog_ids, self._catalog_matrix
+
+    def _get_catalog_etag(self) -> Optional[str]:
+        """Get the ETag of the catalog object, or None if it doesn't exist"""
+        try:
+            response = s3_client.head_object(
+                Bucket=self.similarity_bucket, Key=CATALOG_KEY
+            )
+            return response["ETag"]
+        except ClientError:
+            return None
+
+    def _rank_catalog(
+        self, ref_embedding: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Rank all catalog products by cosine similarity to a reference
+
+        Small catalogs are scored with one NumPy GEMV and argsort, which
+        avoids building a FAISS index; larger ones use the FAISS search.
+
+        Returns:
+            Catalog product IDs, row indices in ranked order and their scores
+        """
+        product_ids, catalog_matrix = self._get_catalog_matrix()
+        if not len(product_ids):
+            return product_ids, np.empty(0, dtype=np.int64), np.empty(0, np.float32)
+
+        ref_vector = ref_embedding.astype(np.float32).reshape(1, -1)
+        ref_vector /= max(float(np.linalg.norm(ref_vector)), 1e-12)
+
+        if len(product_ids) <= FAISS_MIN_CATALOG_SIZE:
+            scores = catalog_matrix.dot(ref_vector[0])
+            indices = np.argsort(-scores)
+            return product_ids, indices, scores[indices]
+
+        _, index = self._get_catalog_index()
+        scores, indices = index.search(ref_vector, index.ntotal)
+        return product_ids, indices[0], scores[0]
+
+    def _get_catalog_index(self) -> Tuple[np.ndarray, Any]:
+        """Get catalog product IDs with a FAISS inner-product index over them"""
+        product_ids, catalog_matrix = self._get_catalog_matrix()
+        if self._faiss_index is None and len(product_ids):
+            # Rows are already L2-normalized, so inner product is cosine
+            faiss = _lazy_import("faiss")
+            self._faiss_index = faiss.IndexFlatIP(catalog_matrix.shape[1])
+            self._faiss_index.add(catalog_matrix)
+        return product_ids, self._faiss_index
+
     def _get_all_products_from_catalog(self) -> List[Dict[str, Any]]:
         """
         Get all products from your product catalog
@@ -227,109 +515,139 @@ class EmbeddingProcessor:
     ) -> Optional[np.ndarray]:
         """Get existing embedding or compute new one"""
         # Check if embedding already exists in database
-        existing_embedding = EmbeddingRepository.get_embedding(product_id)
+        existing_embedding = repository.Embedding.read(product_id, self.model_version)
         if existing_embedding:
-            return np.array(existing_embedding.embedding_vector)
+            return decode_embedding(existing_embedding)
 
-        # Compute new embedding
+        return self._compute_and_store_embedding(product_id, product_data)
+
+    def _compute_and_store_embedding(
+        self, product_id: str, product_data: Dict[str, Any]
+    ) -> Optional[np.ndarray]:
+        """Compute a new embedding and store it quantized in the database"""
         embedding_vector = self.compute_product_embedding(product_data)
         if embedding_vector is None:
             return None
 
         # Store in database
-        db_embedding = DBProductEmbedding(
-            product_id=product_id,
-            embedding_vector=embedding_vector.tolist(),
-            model_version=self.model_version,
-            vector_dimension=len(embedding_vector),
-        )
-
-        success = EmbeddingRepository.store_embedding(db_embedding)
+        db_embedding = self._to_db_embedding(product_id, embedding_vector)
+        success = repository.Embedding.create(db_embedding, self.model_version)
         if not success:
-            logger.warning(f"Failed to store embedding for product {product_id}")
+            logger.warning("Failed to store embedding for product %s", product_id)
 
         return embedding_vector
 
-    def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
-        """Compute cosine similarity between two vectors"""
-        dot_product = np.dot(vec1, vec2)
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
-
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
+    def _to_db_embedding(self, product_id: str, vector: np.ndarray) -> db.Embedding:
+        """Quantize an embedding into its database record"""
+        quantized, scale = quantize_embedding(vector)
+        return db.Embedding(
+            id=product_id,
+            vector=quantized,
+            scale=scale,
+            dtype="int8",
+            model_version=self.model_version,
+        )
 
-        return dot_product / (norm1 * norm2)
+    @staticmethod
+    def _similarity_matrix_key(reference_product_id: str) -> str:
+        """S3 key of the similarity matrix for a reference product"""
+        return f"similarity_matrices/{reference_product_id}.npz.zst"
 
     def _store_similarity_matrix(
-        self, reference_product_id: str, similarities: List[Dict]
+        self, reference_product_id: str, ids: np.ndarray, scores: np.ndarray
     ) -> str:
-        """Store similarity matrix in S3 as compressed numpy file"""
+        """Store similarity matrix in S3 as zstd-compressed numpy arrays"""
         try:
-            # Prepare data for storage
+            # Prepare data for storage as flat arrays (no pickled objects)
             similarity_data = {
-                "reference_product_id": reference_product_id,
-                "similarities": similarities,
-                "computed_at": datetime.utcnow().isoformat(),
-                "model_version": self.model_version,
+                "reference_product_id": np.array(reference_product_id),
+                "ids": ids,
+                "scores": scores.astype(np.float16),
+                "computed_at": np.array(datetime.now(timezone.utc).isoformat()),
+                "model_version": np.array(self.model_version),
             }
 
-            # Convert to compressed bytes
-            import io
-
+            # Convert to zstd-compressed bytes (fixed-width ids compress well)
             buffer = io.BytesIO()
-            np.savez_compressed(buffer, **similarity_data)
-            buffer.seek(0)
+            np.savez(buffer, **similarity_data)
+            compressed = self._zstd_compressor.compress(buffer.getbuffer())
 
             # Upload to S3
-            s3_key = f"similarity_matrices/{reference_product_id}.npz"
-            upload_to_s3(self.similarity_bucket, s3_key, buffer.getvalue())
+            s3_key = self._similarity_matrix_key(reference_product_id)
+            upload_fileobj_to_s3(self.similarity_bucket, s3_key, io.BytesIO(compressed))
 
-            logger.info(f"Stored similarity matrix for {reference_product_id} in S3")
+            logger.info("Stored similarity matrix for %s in S3", reference_product_id)
             return s3_key
 
         except Exception as e:
-            logger.error(f"Failed to store similarity matrix: {e}")
+            logger.error("Failed to store similarity matrix: %s", e)
             raise
 
-    def get_similarity_matrix(self, reference_product_id: str) -> Optional[List[Dict]]:
-        """Retrieve similarity matrix from S3"""
+    def get_similarity_matrix(
+        self, reference_product_id: str, limit: Optional[int] = None
+    ) -> Optional[List[Dict]]:
+        """Retrieve the top `limit` similarities (all if None) from S3"""
         try:
-            s3_key = f"similarity_matrices/{reference_product_id}.npz"
-            data = download_from_s3(self.similarity_bucket, s3_key)
+            s3_key = self._similarity_matrix_key(reference_product_id)
+            compressed = download_from_s3(self.similarity_bucket, s3_key)
+            if compressed[:4] != ZSTD_MAGIC:
+                raise ValueError(f"Not a zstd frame: {s3_key}")
+            data = self._zstd_decompressor.decompress(compressed)
 
-            # Load compressed numpy data
-            import io
+            # Only accept plain npz archives; never run pickle on S3 data
+            if data[:4] != NPZ_MAGIC:
+                raise ValueError(f"Not an npz archive: {s3_key}")
 
-            buffer = io.BytesIO(data)
-            loaded_data = np.load(buffer, allow_pickle=True)
+            with np.load(io.BytesIO(data), allow_pickle=False) as loaded_data:
+                ids = loaded_data["ids"][:limit]
+                scores = loaded_data["scores"][:limit]
 
-            similarities = loaded_data["similarities"].tolist()
-            return similarities
+            # Only materialize dicts for the requested slice
+            return similarity_records(ids, scores)
 
         except FileNotFoundError:
             logger.info(
-                f"No similarity matrix found for product {reference_product_id}"
+                "No similarity matrix found for product %s", reference_product_id
             )
             return None
         except Exception as e:
-            logger.error(f"Failed to load similarity matrix: {e}")
+            logger.error("Failed to load similarity matrix: %s", e)
             return None
 
 
+# Reused across warm invocations of this container
+_processor: Optional[EmbeddingProcessor] = None
+
+
+def get_processor() -> EmbeddingProcessor:
+    """Get the container-wide EmbeddingProcessor, creating it on first use"""
+    global _processor
+    if _processor is None:
+        _processor = EmbeddingProcessor()
+    return _processor
+
+
+def get_request_body(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the request payload, skipping JSON parsing for direct invocations"""
+    if "action" in event:
+        # Direct Lambda-to-Lambda invocations carry the payload on the event
+        return event
+    return parse_json_body(event)
+
+
 def compute_embedding_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handler for computing embeddings for a single product
     POST /embeddings/compute
     """
     try:
-        body = parse_json_body(event)
+        body = get_request_body(event)
         product_data = body.get("product_data")
 
         if not product_data or "id" not in product_data:
             return error_response("product_data with id is required", 400)
 
-        processor = EmbeddingProcessor()
+        processor = get_processor()
 
         # Compute embedding
         embedding_vector = processor.compute_product_embedding(product_data)
@@ -345,7 +663,7 @@ def compute_embedding_handler(event: Dict[str, Any], context: Any) -> Dict[str,
         )
 
     except Exception as e:
-        logger.error(f"Error computing embedding: {e}")
+        logger.error("Error computing embedding: %s", e)
         return error_response("Failed to compute embedding", 500)
 
 
@@ -357,14 +675,14 @@ def compute_similarity_matrix_handler(
     POST /embeddings/similarity
     """
     try:
-        body = parse_json_body(event)
+        body = get_request_body(event)
         reference_product_id = body.get("reference_product_id")
         reference_product_data = body.get("reference_product_data", {})
 
         if not reference_product_id:
             return error_response("reference_product_id is required", 400)
 
-        processor = EmbeddingProcessor()
+        processor = get_processor()
         result = processor.compute_similarity_matrix(
             reference_product_id, reference_product_data
         )
@@ -372,7 +690,7 @@ def compute_similarity_matrix_handler(
         return success_response(result)
 
     except Exception as e:
-        logger.error(f"Error computing similarity matrix: {e}")
+        logger.error("Error computing similarity matrix: %s", e)
         return error_response("Failed to compute similarity matrix", 500)
 
 
@@ -382,12 +700,12 @@ def get_similarity_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any
     GET /embeddings/similarity/:productId
     """
     try:
-        from shared.utils import get_path_parameter
-
         reference_product_id = get_path_parameter(event, "productId")
 
-        processor = EmbeddingProcessor()
-        similarities = processor.get_similarity_matrix(reference_product_id)
+        processor = get_processor()
+        similarities = processor.get_similarity_matrix(
+            reference_product_id, limit=50  # Return top 50
+        )
 
         if similarities is None:
             return error_response("Similarity matrix not found", 404)
@@ -395,12 +713,12 @@ def get_similarity_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any
         return success_response(
             {
                 "reference_product_id": reference_product_id,
-                "similarities": similarities[:50],  # Return top 50
+                "similarities": similarities,
             }
         )
 
     except Exception as e:
-        logger.error(f"Error getting similarity matrix: {e}")
+        logger.error("Error getting similarity matrix: %s", e)
         return error_response("Failed to get similarity matrix", 500)
 
 
@@ -432,5 +750,5 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             return error_response("Not found", 404)
 
     except Exception as e:
-        logger.error(f"Unhandled error in embeddings handler: {e}")
+        logger.error("Unhandled error in embeddings handler: %s", e)
         return error_response("Internal server error", 500)
@@ -6,7 +6,13 @@ EXACTLY matching the React app API specifications from src/lib/api/reportsApi.ts
 """
 
 import logging
-from typing import Dict, Any
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from src.shared.utils import (
     success_response,
@@ -19,51 +25,136 @@ from src.shared.utils import (
     generate_id,
     current_timestamp,
     invoke_lambda_async,
+    download_from_s3,
+    generate_presigned_url,
+    S3MultipartWriter,
+    api_handler,
     AWSConfig,
 )
 from src.shared.auth import require_auth
-from src.shared.models.database import Report, Product, Image
-from src.shared.models.response import ReportList
-from src.shared.models import request
+from src.shared.models.database import Report, Product
+from src.shared.models import request, response
 
 from src.shared.database import repository
+from src.shared.database.base import DatabaseManager
 
 
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get("LOG_LEVEL", "WARNING"))
+
+# Resolved once per container instead of on every create_report call
+EMBEDDINGS_FUNCTION = AWSConfig.get_embeddings_function_name()
+
+
+def _warm_tables() -> None:
+    """
+    Build the handler thread's DynamoDB resource and table handles during init
+    rather than on the first request (no network calls; credentials and
+    endpoints resolve here)
+    """
+    for repo in (repository.Report, repository.Product, repository.Image):
+        repo.get_table()
+
+
+_warm_tables()
+
+# Pool for overlapping independent DynamoDB round trips within a request
+_db_executor = ThreadPoolExecutor(max_workers=8)
+
+# Image fetches for favorites exports overlap with archive compression
+_export_executor = ThreadPoolExecutor(max_workers=16)
+IMAGES_BUCKET = AWSConfig.get_images_bucket()
+EXPORT_URL_TTL = 3600
+
+# Attributes needed for the basic list view; everything else stays in DynamoDB
+REPORT_LIST_ATTRIBUTES = ["id", "title", "author", "reference", "favorites"]
+
+# Reference thumbnails (LRU keyed by product id) shown on every list page; kept
+# briefly since reference products rarely change after a report is created
+THUMBNAIL_TTL = 60.0
+THUMBNAIL_CACHE_SIZE = 4096
+_thumbnails: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_thumbnails_lock = threading.Lock()
+
+
+def _reference_thumbnail(product_id: str) -> str:
+    """Resolve a reference product's first image, reusing recent lookups"""
+    with _thumbnails_lock:
+        cached = _thumbnails.get(product_id)
+        if cached is not None and cached[1] > time.monotonic():
+            _thumbnails.move_to_end(product_id)
+            return cached[0]
+
+    thumbnail = _read_reference_thumbnail(product_id)
+    with _thumbnails_lock:
+        _thumbnails[product_id] = (thumbnail, time.monotonic() + THUMBNAIL_TTL)
+        _thumbnails.move_to_end(product_id)
+        if len(_thumbnails) > THUMBNAIL_CACHE_SIZE:
+            _thumbnails.popitem(last=False)
+    return thumbnail
+
+
+def _read_reference_thumbnail(product_id: str) -> str:
+    """Resolve a reference product's first image, as shown in the list view"""
+    product = repository.Product.read_attributes(product_id, ["images"])
+    if not product or not product.get("images"):
+        raise LookupError(f"Reference {product_id} not found")
+
+    image_id = product["images"][0]
+    image = repository.Image.read_attributes(image_id, ["image", "product"])
+    if not image or image.get("product") != product_id:
+        raise LookupError(f"Images for product {product_id} not found")
+    return image["image"]
 
 
 @require_auth
+@api_handler("Failed to list reports")
 def list_reports(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     GET /reports?limit=20&cursor=abc123
     List user reports
 
-    Note: Uses DynamoDB cursor-based pagination
+    Note: Uses DynamoDB keyset pagination with an opaque cursor; the total is
+    read from a per-user counter item rather than counted on every page
     Intended for ReportsApiService.listReports() in src/lib/api/reportsApi.ts
     """
-    try:
-        user = get_user_from_event(event)
-        limit = int(str(get_query_parameter(event, "limit", "20")))
-        cursor = get_query_parameter(event, "cursor", None)
-        reports, next_cursor = repository.Report.list(
-            user.id, limit=limit, last_key=cursor
-        )
-        response = ReportList(
-            reports=[report.to_api(basic=True) for report in reports],
-            total=repository.Report.count(user.id),
-            limit=limit,
-            next_cursor=next_cursor,
-            has_more=next_cursor is not None,
-        )
-        return success_response(response.model_dump())
-
-    except Exception as e:
-        logger.error(f"Error listing reports: {e}")
-        return error_response("Failed to list reports", 500)
+    user = get_user_from_event(event)
+    limit = int(str(get_query_parameter(event, "limit", "20")))
+    cursor = get_query_parameter(event, "cursor", None)
+
+    # Read the report counter concurrently with the page query
+    total = _db_executor.submit(repository.Report.count, user.id)
+    items, next_cursor = repository.Report.list_attributes(
+        user.id, REPORT_LIST_ATTRIBUTES, limit=limit, last_key=cursor
+    )
+
+    # Project trusted DB rows straight into the response shape
+    thumbnails = _db_executor.map(
+        _reference_thumbnail, [item["reference"] for item in items]
+    )
+    reports = [
+        {
+            "id": item["id"],
+            "title": item["title"],
+            "author": item["author"],
+            "reference": thumbnail,
+            "favorites": item.get("favorites"),
+        }
+        for item, thumbnail in zip(items, thumbnails)
+    ]
+    return success_response(
+        {
+            "reports": reports,
+            "total": total.result(),
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+        }
+    )
 
 
 @require_auth
+@api_handler("Failed to create report")
 def create_report(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     POST /reports
@@ -71,60 +162,61 @@ def create_report(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     Intended for ReportsApiService.createReport() in src/lib/api/reportsApi.ts
     """
-    try:
-        user = get_user_from_event(event)
-        report = request.Report(**parse_json_body(event))
-
-        # Parse request body
-        report = parse_json_body(event)
-        reference = report.pop("reference")
-
-        images = [Image(**img) for img in reference.pop("images")]
-        reference = Product(**reference, images=[img.id for img in images])
-        report = Report(**report, reference=reference.id)
-
-        if not ImageRepository.create_batch(images, reference.id):
-            return error_response("Failed to upload images", 500)
-        if not ProductRepository.create(reference):
-            ImageRepository.delete_batch(images, reference.id)
-            return error_response("Failed to create reference", 500)
-        if not ReportRepository.create(report, user.id):
-            ProductRepository.delete(reference.id)
-            ImageRepository.delete_batch(images, reference.id)
-            return error_response("Failed to create report", 500)
-
-        # Trigger embedding computation for the stored product
-        try:
-            # Invoke embeddings Lambda asynchronously
-            embeddings_function = AWSConfig.get_embeddings_function_name()
-            payload = {
-                "action": "compute_similarity_matrix",
-                "product": reference.id,
-            }
-            invoke_lambda_async(embeddings_function, payload)
-            logger.info(f"Triggered embedding computation for product {reference.id}")
-        except Exception as e:
-            logger.warning(f"Failed to trigger embedding computation: {e}")
-            # Don't fail report creation if embedding computation fails
-
-        # Return created report response
-        response = CreateReportResponse(
-            id=report_id,
-            title=create_request.title,
-            author=db_report.author,
-            date=db_report.date,
-        )
-
-        return success_response(response.model_dump(), 201)
+    user = get_user_from_event(event)
+
+    # Validate the typed request once and derive all DB entities from it
+    body = request.Report.model_validate(parse_json_body(event))
+    report, reference, images = body.to_db(user.id)
+
+    # The transaction only adds to an existing counter, so seed it first
+    repository.Report.count(user.id)
+
+    # Commit images, product, report and counter in one atomic transaction;
+    # only image sets too large for a single transaction are batch-written first
+    writes = [
+        repository.Product.put_request(reference),
+        repository.Report.put_request(report, user.id),
+        repository.Report.count_request(user.id, 1),
+    ]
+    batched = len(images) + len(writes) > DatabaseManager.MAX_TRANSACT_ITEMS
+    if not batched:
+        writes += [repository.Image.put_request(img, reference.id) for img in images]
+    elif not repository.Image.create_batch(images, reference.id):
+        return error_response("Failed to upload images", 500)
+
+    if not DatabaseManager.transact_write(writes):
+        if batched:
+            repository.Image.delete_batch(images)
+        return error_response("Failed to create report", 500)
 
-    except ValueError as e:
-        return error_response(str(e), 400)
+    # Trigger embedding computation for the stored product; the invoke is
+    # asynchronous (Event), but must be sent before the sandbox is frozen.
+    # Don't fail report creation if it fails
+    payload = {
+        "action": "compute_similarity_matrix",
+        "reference_product_id": reference.id,
+        "reference_product_data": reference.model_dump(include={"id", "images"}),
+    }
+    try:
+        invoke_lambda_async(EMBEDDINGS_FUNCTION, payload)
     except Exception as e:
-        logger.error(f"Error creating report: {e}")
-        return error_response("Failed to create report", 500)
+        logger.warning("Failed to trigger embedding computation: %s", e)
+
+    # Return created report response (entities were validated by to_db)
+    return success_response(
+        {
+            "id": report.id,
+            "title": report.title,
+            "author": report.author,
+            "reference": reference.id,
+            "favorites": report.favorites,
+        },
+        201,
+    )
 
 
 @require_auth
+@api_handler("Failed to get report")
 def get_report(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     GET /reports/:reportId
@@ -132,28 +224,31 @@ def get_report(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     EXACT match for ReportsApiService.getReport() in src/lib/api/reportsApi.ts
     """
-    try:
-        user = get_user_from_event(event)
-        user_id = user["user_id"]
-        report_id = get_path_parameter(event, "reportId")
+    user = get_user_from_event(event)
+    report_id = get_path_parameter(event, "reportId")
 
-        # Get report with populated product reference (full Product for detail view)
-        report = ReportRepository.get_report_with_product(
-            report_id, user_id, as_product_index=False
-        )
-        if not report:
-            return error_response("Report not found", 404)
+    report = repository.Report.read(report_id, user.id)
+    if report is None:
+        return error_response("Report not found", 404)
 
-        return success_response(report.model_dump())
+    # Populate the reference with the full Product for the detail view
+    reference = repository.Product.read(report.reference)
+    if reference is None:
+        return error_response("Reference product not found", 404)
 
-    except ValueError as e:
-        return error_response(str(e), 400)
-    except Exception as e:
-        logger.error(f"Error getting report: {e}")
-        return error_response("Failed to get report", 500)
+    return success_response(
+        {
+            "id": report.id,
+            "title": report.title,
+            "author": report.author,
+            "reference": reference.model_dump(),
+            "favorites": report.favorites,
+        }
+    )
 
 
 @require_auth
+@api_handler("Failed to update report")
 def update_report(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     PATCH /reports/:reportId
@@ -161,53 +256,35 @@ def update_report(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     EXACT match for ReportsApiService.updateReport() in src/lib/api/reportsApi.ts
     """
-    try:
-        user = get_user_from_event(event)
-        user_id = user["user_id"]
-        report_id = get_path_parameter(event, "reportId")
-
-        # Parse request body
-        body = parse_json_body(event)
-
-        # Get current report
-        db_report = ReportRepository.get_report(report_id, user_id)
-        if not db_report:
-            return error_response("Report not found", 404)
-
-        # Update fields if provided
-        if "title" in body:
-            db_report.title = body["title"]
-
-        # Update timestamp
-        from datetime import datetime
-
-        db_report.updated_at = datetime.utcnow()
-
-        # Save to database
-        success = ReportRepository.update_report(db_report)
-        if not success:
-            return error_response("Failed to update report", 500)
-
-        # Convert to API format
-        report = Report(
-            id=db_report.id,
-            title=db_report.title,
-            author=db_report.author,
-            date=db_report.date,
-            reference=db_report.reference,
-            favorites=db_report.favorites,
-        )
-
-        return success_response(report.model_dump())
-
-    except ValueError as e:
-        return error_response(str(e), 400)
-    except Exception as e:
-        logger.error(f"Error updating report: {e}")
-        return error_response("Failed to update report", 500)
+    user = get_user_from_event(event)
+    report_id = get_path_parameter(event, "reportId")
+
+    # Parse request body
+    body = parse_json_body(event)
+    if not isinstance(body.get("title"), str):
+        return error_response("Title must be a string", 400)
+
+    # Ownership check and write in a single conditional update
+    db_report = repository.Report.update(
+        Report(id=report_id, author=user.id, title=body["title"]), user.id
+    )
+    if db_report is None:
+        return error_response("Report not found", 404)
+
+    # Convert to API format (fields are already validated on read)
+    return success_response(
+        {
+            "id": db_report.id,
+            "title": db_report.title,
+            "author": db_report.author,
+            "reference": db_report.reference,
+            "favorites": db_report.favorites,
+        }
+    )
 
 
 @require_auth
+@api_handler("Failed to delete report")
 def delete_report(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     DELETE /reports/:reportId
@@ -215,26 +292,24 @@ def delete_report(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     EXACT match for ReportsApiService.deleteReport() in src/lib/api/reportsApi.ts
     """
-    try:
-        user = get_user_from_event(event)
-        user_id = user["user_id"]
-        report_id = get_path_parameter(event, "reportId")
+    user = get_user_from_event(event)
+    report_id = get_path_parameter(event, "reportId")
 
-        # Delete from database
-        success = ReportRepository.delete_report(report_id, user_id)
-        if not success:
-            return error_response("Report not found", 404)
+    # Delete the report and decrement the counter atomically; the ownership
+    # condition fails the whole transaction for missing or foreign reports
+    repository.Report.count(user.id)
+    writes = [
+        repository.Report.delete_request(report_id, user.id),
+        repository.Report.count_request(user.id, -1),
+    ]
+    if not DatabaseManager.transact_write(writes):
+        return error_response("Report not found", 404)
 
-        return success_response({"success": True})
-
-    except ValueError as e:
-        return error_response(str(e), 400)
-    except Exception as e:
-        logger.error(f"Error deleting report: {e}")
-        return error_response("Failed to delete report", 500)
+    return success_response({"success": True})
 
 
 @require_auth
+@api_handler("Failed to search products")
 def search_products(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     POST /reports/:reportId/search
@@ -242,46 +317,38 @@ def search_products(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     EXACT match for ReportsApiService.searchProducts() in src/lib/api/reportsApi.ts
     """
-    try:
-        user = get_user_from_event(event)
-        user_id = user["user_id"]
-        report_id = get_path_parameter(event, "reportId")
-
-        # Verify user owns the report
-        db_report = ReportRepository.get_report(report_id, user_id)
-        if not db_report:
-            return error_response("Report not found", 404)
-
-        # Parse search request
-        body = parse_json_body(event)
-        search_request = SearchProductsRequest(**body)
-
-        # TODO: Implement actual product search
-        # This would integrate with:
-        # 1. Your product catalog/database
-        # 2. Embedding-based similarity search via embeddings Lambda
-        # 3. Traditional filtering based on SearchFilters
-
-        # For now, return empty results
-        logger.info(f"Product search request: {search_request}")
-
-        response = SearchProductsResponse(
-            products=[],
-            total=0,
-            page=search_request.page or 1,
-            limit=search_request.limit or 20,
-        )
+    user = get_user_from_event(event)
+    report_id = get_path_parameter(event, "reportId")
 
-        return success_response(response.model_dump())
+    # Verify user owns the report
+    if not repository.Report.exists(report_id, user.id):
+        return error_response("Report not found", 404)
 
-    except ValueError as e:
-        return error_response(str(e), 400)
-    except Exception as e:
-        logger.error(f"Error searching products: {e}")
-        return error_response("Failed to search products", 500)
+    # Parse search request
+    body = parse_json_body(event)
+    search_request = request.Search(**body)
+
+    # TODO: Implement actual product search
+    # This would integrate with:
+    # 1. Your product catalog/database
+    # 2. Embedding-based similarity search via embeddings Lambda
+    # 3. Traditional filtering based on SearchFilters
+
+    # For now, return empty results
+    logger.debug("Product search request: %s", search_request)
+
+    results = response.SearchResults(
+        products=[],
+        total=0,
+        page=search_request.page or 1,
+        limit=search_request.limit or 20,
+    )
+
+    return success_response(results.model_dump())
 
 
 @require_auth
+@api_handler("Failed to get product")
 def get_product(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     GET /reports/:reportId/products/:productId
@@ -289,32 +356,24 @@ def get_product(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     EXACT match for ReportsApiService.getProduct() in src/lib/api/reportsApi.ts
     """
-    try:
-        user = get_user_from_event(event)
-        user_id = user["user_id"]
-        report_id = get_path_parameter(event, "reportId")
-        product_id = get_path_parameter(event, "productId")
+    user = get_user_from_event(event)
+    report_id = get_path_parameter(event, "reportId")
+    product_id = get_path_parameter(event, "productId")
 
-        # Verify user owns the report
-        db_report = ReportRepository.get_report(report_id, user_id)
-        if not db_report:
-            return error_response("Report not found", 404)
+    # Verify user owns the report
+    if not repository.Report.exists(report_id, user.id):
+        return error_response("Report not found", 404)
 
-        # TODO: Get product from your product catalog
-        # This would integrate with your product database/service
+    # TODO: Get product from your product catalog
+    # This would integrate with your product database/service
 
-        logger.info(f"Get product request: report={report_id}, product={product_id}")
+    logger.debug("Get product request: report=%s, product=%s", report_id, product_id)
 
-        return error_response("Product not found", 404)
-
-    except ValueError as e:
-        return error_response(str(e), 400)
-    except Exception as e:
-        logger.error(f"Error getting product: {e}")
-        return error_response("Failed to get product", 500)
+    return error_response("Product not found", 404)
 
 
 @require_auth
+@api_handler("Failed to update favorite status")
 def update_favorite_status(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     PUT /reports/:reportId/favorites/:productId
@@ -322,46 +381,29 @@ def update_favorite_status(event: Dict[str, Any], context: Any) -> Dict[str, Any
 
     EXACT match for ReportsApiService.updateFavoriteStatus() in src/lib/api/reportsApi.ts
     """
-    try:
-        user = get_user_from_event(event)
-        user_id = user["user_id"]
-        report_id = get_path_parameter(event, "reportId")
-        product_id = get_path_parameter(event, "productId")
-
-        # Parse request body
-        body = parse_json_body(event)
-        is_favorite = body.get("isFavorite", False)
-
-        # Get current report
-        db_report = ReportRepository.get_report(report_id, user_id)
-        if not db_report:
-            return error_response("Report not found", 404)
-
-        # Update favorites list
-        current_favorites = db_report.favorites or []
-
-        if is_favorite and product_id not in current_favorites:
-            current_favorites.append(product_id)
-        elif not is_favorite and product_id in current_favorites:
-            current_favorites.remove(product_id)
-
-        # Update in database
-        success = ReportRepository.update_report_favorites(
-            report_id, user_id, current_favorites
-        )
-        if not success:
-            return error_response("Failed to update favorites", 500)
+    user = get_user_from_event(event)
+    report_id = get_path_parameter(event, "reportId")
+    product_id = get_path_parameter(event, "productId")
 
-        return success_response({"success": True})
+    # Parse request body
+    body = parse_json_body(event)
+    is_favorite = body.get("isFavorite", False)
 
-    except ValueError as e:
-        return error_response(str(e), 400)
-    except Exception as e:
-        logger.error(f"Error updating favorite status: {e}")
-        return error_response("Failed to update favorite status", 500)
+    # Single conditional write for adds; removals re-check the index
+    if is_favorite:
+        success = repository.Report.add_favorite(report_id, user.id, product_id)
+    else:
+        success = repository.Report.remove_favorite(report_id, user.id, product_id)
+        if success is False:
+            return error_response("Favorites changed concurrently, retry", 409)
+    if not success:
+        return error_response("Report not found", 404)
+
+    return success_response({"success": True})
 
 
 @require_auth
+@api_handler("Failed to sync favorites")
 def sync_favorites(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     PUT /reports/:reportId/favorites
@@ -369,35 +411,37 @@ def sync_favorites(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     EXACT match for ReportsApiService.syncFavorites() in src/lib/api/reportsApi.ts
     """
-    try:
-        user = get_user_from_event(event)
-        user_id = user["user_id"]
-        report_id = get_path_parameter(event, "reportId")
-
-        # Parse request body
-        body = parse_json_body(event)
-        favorites = body.get("favorites", [])
-
-        if not isinstance(favorites, list):
-            return error_response("Favorites must be an array", 400)
-
-        # Update in database
-        success = ReportRepository.update_report_favorites(
-            report_id, user_id, favorites
-        )
-        if not success:
-            return error_response("Report not found", 404)
-
+    user = get_user_from_event(event)
+    report_id = get_path_parameter(event, "reportId")
+
+    # Check ownership before spending any work on the (possibly large) body
+    current = repository.Report.read_favorites(report_id, user.id)
+    if current is None:
+        return error_response("Report not found", 404)
+
+    # Parse request body
+    body = parse_json_body(event)
+    favorites = body.get("favorites", [])
+
+    if not isinstance(favorites, list):
+        return error_response("Favorites must be an array", 400)
+    if not all(isinstance(fav, str) and fav for fav in favorites):
+        return error_response("Favorites must be non-empty strings", 400)
+
+    # Drop duplicates (keeping first-seen order) and skip unchanged writes
+    favorites = list(dict.fromkeys(favorites))
+    if current == favorites:
         return success_response({"success": True})
 
-    except ValueError as e:
-        return error_response(str(e), 400)
-    except Exception as e:
-        logger.error(f"Error syncing favorites: {e}")
+    # Update in database
+    if not repository.Report.update_favorites(report_id, user.id, favorites):
         return error_response("Failed to sync favorites", 500)
 
+    return success_response({"success": True})
+
 
 @require_auth
+@api_handler("Failed to export favorites")
 def export_favorites(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     GET /reports/:reportId/export
@@ -405,34 +449,77 @@ def export_favorites(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
     EXACT match for ReportsApiService.exportFavorites() in src/lib/api/reportsApi.ts
     """
+    user = get_user_from_event(event)
+    report_id = get_path_parameter(event, "reportId")
+
+    # Ownership check and favorites in one projected read
+    favorites = repository.Report.read_favorites(report_id, user.id)
+    if favorites is None:
+        return error_response("Report not found", 404)
+    if not favorites:
+        return error_response("No favorites to export", 400)
+
+    # Favorites whose product (or some of its images) no longer exists are
+    # exported without them and listed as missing
+    products = repository.Product.read_batch(favorites)
+    found = {product.id for product in products}
+    missing = [product_id for product_id in favorites if product_id not in found]
+    if not products:
+        return error_response("No favorited products found", 404)
+
+    # Stream the archive into a multipart upload so memory stays flat
+    bucket = AWSConfig.get_exports_bucket()
+    key = f"exports/{user.id}/{report_id}/{generate_id()}.zip"
+    sink = S3MultipartWriter(bucket, key, "application/zip")
     try:
-        user = get_user_from_event(event)
-        user_id = user["user_id"]
-        report_id = get_path_parameter(event, "reportId")
-
-        # Get report with favorites
-        db_report = ReportRepository.get_report(report_id, user_id)
-        if not db_report:
-            return error_response("Report not found", 404)
-
-        favorites = db_report.favorites or []
-        if not favorites:
-            return error_response("No favorites to export", 400)
-
-        # TODO: Implement actual export functionality
-        # This would:
-        # 1. Fetch product details for all favorited products
-        # 2. Generate a ZIP file with product images and data
-        # 3. Upload to S3 and return a presigned URL
-        # 4. Or return the ZIP file directly as a binary response
-
-        return error_response("Export functionality not implemented yet", 501)
-
-    except ValueError as e:
-        return error_response(str(e), 400)
-    except Exception as e:
-        logger.error(f"Error exporting favorites: {e}")
-        return error_response("Failed to export favorites", 500)
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+            for product in products:
+                if not _write_product_archive(archive, product):
+                    missing.append(product.id)
+    except Exception:
+        sink.abort()
+        raise
+    sink.close()
+
+    url = generate_presigned_url(bucket, key, EXPORT_URL_TTL)
+    return success_response(
+        {"url": url, "expires_in": EXPORT_URL_TTL, "missing": missing}
+    )
+
+
+def _write_product_archive(archive: zipfile.ZipFile, product: Product) -> bool:
+    """Add a product's data and images to an export archive, False if incomplete"""
+    archive.writestr(f"{product.id}/product.json", product.model_dump_json(indent=2))
+
+    ids = product.images or []
+    images = repository.Image.read_batch(ids, product.id)
+    contents = _export_executor.map(
+        lambda image: download_from_s3(IMAGES_BUCKET, image.image), images
+    )
+    for index, (image, data) in enumerate(zip(images, contents)):
+        # Images are already compressed; deflating them again only costs CPU
+        archive.writestr(
+            f"{product.id}/{index}{os.path.splitext(image.image)[1]}",
+            data,
+            compress_type=zipfile.ZIP_STORED,
+        )
+    return len(images) == len(ids)
+
+
+# Routes keyed by (method, segment count, sub-resource) of the split path, e.g.
+# /reports/{id}/favorites/{productId} -> ("PUT", 4, "favorites")
+ROUTES: Dict[Tuple[str, int, Optional[str]], Callable] = {
+    ("GET", 1, None): list_reports,
+    ("POST", 1, None): create_report,
+    ("GET", 2, None): get_report,
+    ("PATCH", 2, None): update_report,
+    ("DELETE", 2, None): delete_report,
+    ("POST", 3, "search"): search_products,
+    ("GET", 4, "products"): get_product,
+    ("PUT", 4, "favorites"): update_favorite_status,
+    ("PUT", 3, "favorites"): sync_favorites,
+    ("GET", 3, "export"): export_favorites,
+}
 
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -441,6 +528,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Routes requests based on HTTP method and path
     """
     try:
+        # Scheduled warmer pings exit before any routing or DB work
+        if event.get("source") == "warmer":
+            return {"statusCode": 200, "body": "warm"}
+
         # Handle CORS preflight
         cors_response = handle_cors_preflight(event)
         if cors_response:
@@ -449,30 +540,18 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         method = event.get("httpMethod", "").upper()
         path = event.get("path", "")
 
-        # Route to appropriate handler
-        if method == "GET" and path == "/reports":
-            return list_reports(event, context)
-        elif method == "POST" and path == "/reports":
-            return create_report(event, context)
-        elif method == "GET" and "/reports/" in path and path.count("/") == 2:
-            return get_report(event, context)
-        elif method == "PATCH" and "/reports/" in path and path.count("/") == 2:
-            return update_report(event, context)
-        elif method == "DELETE" and "/reports/" in path and path.count("/") == 2:
-            return delete_report(event, context)
-        elif method == "POST" and "/search" in path:
-            return search_products(event, context)
-        elif method == "GET" and "/products/" in path and "/export" not in path:
-            return get_product(event, context)
-        elif method == "PUT" and "/favorites/" in path and path.count("/") == 4:
-            return update_favorite_status(event, context)
-        elif method == "PUT" and path.endswith("/favorites"):
-            return sync_favorites(event, context)
-        elif method == "GET" and path.endswith("/export"):
-            return export_favorites(event, context)
-        else:
+        # Route to appropriate handler with one split and one dict lookup
+        parts = path.strip("/").split("/")
+        route = None
+        if parts[0] == "reports" and all(parts):
+            route = ROUTES.get(
+                (method, len(parts), parts[2] if len(parts) > 2 else None)
+            )
+
+        if route is None:
             return error_response("Not found", 404, "NOT_FOUND")
+        return route(event, context)
 
     except Exception as e:
-        logger.error(f"Unhandled error in reports handler: {e}")
+        logger.error("Unhandled error in reports handler: %s", e)
         return error_response("Internal server error", 500, "INTERNAL_ERROR")
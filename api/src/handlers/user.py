@@ -6,7 +6,9 @@ EXACTLY matching the React app API specifications from src/lib/api/userApi.ts
 """
 
 import logging
-from typing import Dict, Any
+import os
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Tuple
 
 from shared.utils import (
     success_response,
@@ -21,7 +23,7 @@ from shared.database import UserRepository
 
 
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get("LOG_LEVEL", "WARNING"))
 
 
 @require_auth
@@ -64,7 +66,7 @@ def get_profile(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         return success_response(profile.model_dump())
 
     except Exception as e:
-        logger.error(f"Error getting user profile: {e}")
+        logger.error("Error getting user profile: %s", e)
         return error_response("Failed to get user profile", 500)
 
 
@@ -104,9 +106,7 @@ def update_profile(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             )
 
         # Update timestamp
-        from datetime import datetime
-
-        db_user.updated_at = datetime.utcnow()
+        db_user.updated_at = datetime.now(timezone.utc)
 
         # Save to database
         success = UserRepository.update_user(db_user)
@@ -129,7 +129,7 @@ def update_profile(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     except ValueError as e:
         return error_response(str(e), 400)
     except Exception as e:
-        logger.error(f"Error updating user profile: {e}")
+        logger.error("Error updating user profile: %s", e)
         return error_response("Failed to update user profile", 500)
 
 
@@ -154,18 +154,25 @@ def upload_avatar(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         db_user = UserRepository.get_user(user_id)
         if db_user:
             db_user.avatar_url = avatar_url
-            from datetime import datetime
-
-            db_user.updated_at = datetime.utcnow()
+            db_user.updated_at = datetime.now(timezone.utc)
             UserRepository.update_user(db_user)
 
         return success_response({"avatarUrl": avatar_url})
 
     except Exception as e:
-        logger.error(f"Error uploading avatar: {e}")
+        logger.error("Error uploading avatar: %s", e)
         return error_response("Failed to upload avatar", 500)
 
 
+# Routes keyed by (method, last path segment); matching the suffix keeps paths
+# carrying a stage or base-path prefix routable
+ROUTES: Dict[Tuple[str, str], Callable] = {
+    ("GET", "profile"): get_profile,
+    ("PATCH", "profile"): update_profile,
+    ("POST", "avatar"): upload_avatar,
+}
+
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda handler for user API
@@ -181,15 +188,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         path = event.get("path", "")
 
         # Route to appropriate handler
-        if method == "GET" and path.endswith("/profile"):
-            return get_profile(event, context)
-        elif method == "PATCH" and path.endswith("/profile"):
-            return update_profile(event, context)
-        elif method == "POST" and path.endswith("/avatar"):
-            return upload_avatar(event, context)
-        else:
+        route = ROUTES.get((method, path.rstrip("/").rpartition("/")[2]))
+        if route is None:
             return error_response("Not found", 404, "NOT_FOUND")
+        return route(event, context)
 
     except Exception as e:
-        logger.error(f"Unhandled error in user handler: {e}")
+        logger.error("Unhandled error in user handler: %s", e)
         return error_response("Internal server error", 500, "INTERNAL_ERROR")
@@ -2,65 +2,100 @@
 Authentication and authorization utilities for K9 API
 """
 
-import json
+import base64
+import hashlib
 import logging
-from typing import Dict, Any, Optional, Callable
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
 from functools import wraps
-import boto3
-from jose import jwt, JWTError
+import orjson
+import urllib3
+from jose import jwk, jwt, JWTError
 from jose.exceptions import ExpiredSignatureError, JWTClaimsError
 
+from .utils import current_timestamp, error_response
+
 
 logger = logging.getLogger()
 
-# Cognito client
-cognito_client = boto3.client("cognito-idp")
+# JWKS endpoint, resolved once per container and fetched over a pooled
+# keep-alive connection (urllib3 ships with botocore)
+USER_POOL_ID = os.environ.get("COGNITO_USER_POOL_ID")
+REGION = os.environ.get("AWS_REGION", "us-east-1")
+JWKS_URL = (
+    f"https://cognito-idp.{REGION}.amazonaws.com/{USER_POOL_ID}/.well-known/jwks.json"
+)
+_http = urllib3.PoolManager(num_pools=1, maxsize=2, retries=urllib3.Retry(total=2))
 
+# Cognito signing keys, constructed once and indexed by kid; refreshed after
+# JWKS_TTL seconds, or sooner (rate-limited) when an unknown kid shows up
+JWKS_TTL = 3600.0
+JWKS_MIN_REFRESH = 60.0
+_signing_keys: Tuple[Dict[str, Any], float] = ({}, float("-inf"))
 
-def get_cognito_public_keys() -> Dict[str, Any]:
-    """Get Cognito public keys for JWT verification"""
-    import os
-    import requests
+# Claims of recently verified tokens (LRU keyed by token digest), served only
+# until the token's own exp so expiry is still enforced
+TOKEN_CACHE_SIZE = 1024
+_verified_tokens: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
 
-    user_pool_id = os.environ.get("COGNITO_USER_POOL_ID")
-    region = os.environ.get("AWS_REGION", "us-east-1")
 
-    if not user_pool_id:
+def get_cognito_public_keys() -> Dict[str, Any]:
+    """Get Cognito public keys for JWT verification"""
+    if not USER_POOL_ID:
         raise ValueError("COGNITO_USER_POOL_ID environment variable not set")
 
-    jwks_url = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
-
     try:
-        response = requests.get(jwks_url)
-        response.raise_for_status()
-        return response.json()
+        response = _http.request("GET", JWKS_URL)
+        if response.status != 200:
+            raise ValueError(f"JWKS request returned HTTP {response.status}")
+        return orjson.loads(response.data)
     except Exception as e:
-        logger.error(f"Failed to fetch Cognito public keys: {e}")
+        logger.error("Failed to fetch Cognito public keys: %s", e)
         raise
 
 
+def get_signing_key(kid: str) -> Any:
+    """Get the constructed Cognito public key for a kid, refetching when stale"""
+    global _signing_keys
+
+    keys, fetched_at = _signing_keys
+    age = time.monotonic() - fetched_at
+    if age >= JWKS_TTL or (kid not in keys and age >= JWKS_MIN_REFRESH):
+        jwks = get_cognito_public_keys()
+        keys = {k["kid"]: jwk.construct(k, algorithm="RS256") for k in jwks["keys"]}
+        _signing_keys = (keys, time.monotonic())
+
+    key = keys.get(kid)
+    if key is None:
+        raise JWTError("Unable to find appropriate key")
+    return key
+
+
+def get_token_kid(token: str) -> str:
+    """Read the kid from a JWT header without jose's full header parsing"""
+    header = token.split(".", 1)[0]
+    padded = header + "=" * (-len(header) % 4)
+    try:
+        fields = orjson.loads(base64.urlsafe_b64decode(padded))
+        kid = fields.get("kid") if isinstance(fields, dict) else None
+    except ValueError:
+        raise JWTError("Error decoding token headers.") from None
+
+    if not kid:
+        raise JWTError("Token header missing 'kid'")
+    return kid
+
+
 def verify_jwt_token(token: str) -> Dict[str, Any]:
     """Verify and decode a Cognito JWT token"""
     try:
-        # Get public keys
-        jwks = get_cognito_public_keys()
-
         # Decode header to get kid
-        unverified_header = jwt.get_unverified_header(token)
-        kid = unverified_header.get("kid")
-
-        if not kid:
-            raise JWTError("Token header missing 'kid'")
+        kid = get_token_kid(token)
 
         # Find the correct key
-        key = None
-        for k in jwks["keys"]:
-            if k["kid"] == kid:
-                key = k
-                break
-
-        if not key:
-            raise JWTError("Unable to find appropriate key")
+        key = get_signing_key(kid)
 
         # Verify and decode token
         decoded_token = jwt.decode(
@@ -77,9 +112,25 @@ def verify_jwt_token(token: str) -> Dict[str, Any]:
         raise JWTError(f"Token verification failed: {e}")
 
 
+def verify_jwt_token_cached(token: str) -> Dict[str, Any]:
+    """Verify a JWT, reusing claims of recently verified identical tokens"""
+    digest = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    decoded = _verified_tokens.get(digest)
+    if decoded is not None and decoded.get("exp", 0) > time.time():
+        _verified_tokens.move_to_end(digest)
+        return decoded
+
+    _verified_tokens.pop(digest, None)
+    decoded = verify_jwt_token(token)
+    _verified_tokens[digest] = decoded
+    if len(_verified_tokens) > TOKEN_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
+    return decoded
+
+
 def extract_user_from_token(token: str) -> Dict[str, Any]:
     """Extract user information from JWT token"""
-    decoded = verify_jwt_token(token)
+    decoded = verify_jwt_token_cached(token)
 
     return {
         "user_id": decoded.get("sub"),
@@ -101,16 +152,12 @@ def require_auth(handler_func: Callable) -> Callable:
             auth_header = headers.get("Authorization") or headers.get("authorization")
 
             if not auth_header:
-                from .utils import error_response
-
                 return error_response(
                     "Missing Authorization header", 401, "MISSING_AUTH"
                 )
 
             # Extract Bearer token
             if not auth_header.startswith("Bearer "):
-                from .utils import error_response
-
                 return error_response(
                     "Invalid Authorization header format", 401, "INVALID_AUTH_FORMAT"
                 )
@@ -127,14 +174,10 @@ def require_auth(handler_func: Callable) -> Callable:
             return handler_func(event, context)
 
         except JWTError as e:
-            from .utils import error_response
-
-            logger.warning(f"Authentication failed: {e}")
+            logger.warning("Authentication failed: %s", e)
             return error_response("Invalid or expired token", 401, "INVALID_TOKEN")
         except Exception as e:
-            from .utils import error_response
-
-            logger.error(f"Authentication error: {e}")
+            logger.error("Authentication error: %s", e)
             return error_response("Authentication failed", 500, "AUTH_ERROR")
 
     return wrapper
@@ -158,14 +201,13 @@ def create_user_profile(user_data: Dict[str, Any]) -> Dict[str, Any]:
     # 2. Store extended profile in DuckDB
     # 3. Return the created profile
 
-    from .utils import current_timestamp
-
+    timestamp = current_timestamp()
     return {
         "user_id": user_data["user_id"],
         "name": user_data.get("name", user_data.get("username", "Unknown")),
         "email": user_data.get("email"),
         "avatar_url": None,
         "preferences": {},
-        "created_at": current_timestamp(),
-        "updated_at": current_timestamp(),
+        "created_at": timestamp,
+        "updated_at": timestamp,
     }
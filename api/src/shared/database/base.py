@@ -1,199 +1,345 @@
+import base64
 from decimal import Decimal
 import logging
 import os
-from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, Type, TypeVar
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 import boto3
 from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.types import Binary
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from types_boto3_dynamodb.service_resource import Table
+import orjson
 
 from src.shared.models.base import BaseEntity
-from src.shared.utils import current_timestamp
+from src.shared.utils import boto_config, current_timestamp
+
+if TYPE_CHECKING:
+    # Type stubs only; not shipped in the Lambda layers
+    from types_boto3_dynamodb.service_resource import Table
 
 logger = logging.getLogger()
 T = TypeVar("T", bound="BaseEntity")
 
+# DynamoDB calls are small and latency-bound: fail fast on a dead pooled
+# connection and let the retry policy open a fresh one, instead of waiting on
+# botocore's 60 s default read timeout
+dynamodb_config = boto_config.merge(Config(connect_timeout=2, read_timeout=5))
+
 
 class DatabaseManager:
     """Manages DynamoDB connections and configuration"""
 
-    _dynamodb = None
-    _users_table = None
-    _reports_table = None
-    _products_table = None
-    _embeddings_table = None
+    # boto3 resources (and their Table objects) aren't thread-safe, and the
+    # repositories are used from handler thread pools, so each thread gets its
+    # own session, resource and table handles
+    _local = threading.local()
+
+    MAX_TRANSACT_ITEMS = 100  # DynamoDB limit per TransactWriteItems call
 
     @classmethod
     def get_dynamodb_resource(cls):
-        """Get or create DynamoDB resource"""
-        if cls._dynamodb is None:
-            cls._dynamodb = boto3.resource("dynamodb")
-        return cls._dynamodb
+        """Get or create this thread's DynamoDB resource"""
+        resource = getattr(cls._local, "dynamodb", None)
+        if resource is None:
+            session = boto3.Session()
+            resource = session.resource("dynamodb", config=dynamodb_config)
+            cls._local.dynamodb = resource
+            cls._local.tables = {}
+        return resource
+
+    @classmethod
+    def _get_table(cls, variable: str, default: str):
+        """Get this thread's handle on the table named by an environment variable"""
+        resource = cls.get_dynamodb_resource()
+        table = cls._local.tables.get(variable)
+        if table is None:
+            table = resource.Table(os.environ.get(variable, default))
+            cls._local.tables[variable] = table
+        return table
 
     @classmethod
     def get_users_table(cls):
         """Get Users table reference"""
-        if cls._users_table is None:
-            table_name = os.environ.get("DYNAMODB_USERS_TABLE", "k9-users-dev")
-            cls._users_table = cls.get_dynamodb_resource().Table(table_name)
-        return cls._users_table
+        return cls._get_table("DYNAMODB_USERS_TABLE", "k9-users-dev")
 
     @classmethod
     def get_reports_table(cls):
         """Get Reports table reference"""
-        if cls._reports_table is None:
-            table_name = os.environ.get("DYNAMODB_REPORTS_TABLE", "k9-reports-dev")
-            cls._reports_table = cls.get_dynamodb_resource().Table(table_name)
-        return cls._reports_table
+        return cls._get_table("DYNAMODB_REPORTS_TABLE", "k9-reports-dev")
 
     @classmethod
     def get_products_table(cls):
         """Get Products table reference"""
-        if cls._products_table is None:
-            table_name = os.environ.get("DYNAMODB_PRODUCTS_TABLE", "k9-products-dev")
-            cls._products_table = cls.get_dynamodb_resource().Table(table_name)
-        return cls._products_table
+        return cls._get_table("DYNAMODB_PRODUCTS_TABLE", "k9-products-dev")
 
     @classmethod
     def get_images_table(cls):
         """Get Images table reference"""
-        if cls._images_table is None:
-            table_name = os.environ.get("DYNAMODB_IMAGES_TABLE", "k9-images-dev")
-            cls._images_table = cls.get_dynamodb_resource().Table(table_name)
-        return cls._images_table
+        return cls._get_table("DYNAMODB_IMAGES_TABLE", "k9-images-dev")
+
+    @classmethod
+    def get_embeddings_table(cls):
+        """Get Embeddings table reference"""
+        return cls._get_table("DYNAMODB_EMBEDDINGS_TABLE", "k9-embeddings-dev")
 
     @classmethod
     def from_decimals(cls, obj):
         """Convert DynamoDB Decimal objects to regular numbers"""
+        # Strings (ids, names, timestamps) are the bulk of leaves and never
+        # change, so they skip the recursive call
         if isinstance(obj, list):
-            return [cls.from_decimals(item) for item in obj]
+            return [
+                item if type(item) is str else cls.from_decimals(item) for item in obj
+            ]
         elif isinstance(obj, dict):
-            return {key: cls.from_decimals(value) for key, value in obj.items()}
+            return {
+                key: value if type(value) is str else cls.from_decimals(value)
+                for key, value in obj.items()
+            }
         elif isinstance(obj, Decimal):
             return int(obj) if obj % 1 == 0 else float(obj)
+        elif isinstance(obj, Binary):
+            return obj.value
         return obj
 
     @classmethod
     def to_decimals(cls, obj):
         """Prepare data for DynamoDB by converting floats to Decimals"""
         if isinstance(obj, list):
-            return [cls.to_decimals(item) for item in obj]
+            return [
+                item if type(item) is str else cls.to_decimals(item) for item in obj
+            ]
         elif isinstance(obj, dict):
-            return {key: cls.to_decimals(value) for key, value in obj.items()}
+            return {
+                key: value if type(value) is str else cls.to_decimals(value)
+                for key, value in obj.items()
+            }
+        elif isinstance(obj, bool):
+            return obj
         elif isinstance(obj, (int, float)):
             return Decimal(str(obj))
         return obj
 
+    @classmethod
+    def transact_write(cls, items: List[Dict[str, Any]]) -> bool:
+        """Apply write requests atomically in one TransactWriteItems call"""
+        try:
+            client = cls.get_dynamodb_resource().meta.client
+            client.transact_write_items(TransactItems=items)
+            logger.info("Committed transaction of %s writes", len(items))
+            return True
+
+        except Exception as e:
+            logger.error("Failed to commit transaction of %s writes: %s", len(items), e)
+
+        return False
+
 
 class BaseRepository(Generic[T]):
     """Generic repository for DynamoDB-backed entities."""
 
     name: str
     schema: Type[T]
-    get_table: Callable[..., Table]
+    get_table: Callable[..., "Table"]
     modifiable: List[str] = []
     partition_key: Optional[str] = None  # DynamoDB partition key for queries / access
+    id_key: str = "id"  # Table attribute holding the entity id
 
     # ================
     # CRUD methods
     # ================
 
+    @classmethod
+    def to_item(cls, entity: T, partition: Optional[str] = None) -> Dict[str, Any]:
+        """Serialize an entity into a DynamoDB item"""
+        entry = DatabaseManager.to_decimals(entity.model_dump(exclude_none=True))
+        if cls.id_key != "id":
+            entry[cls.id_key] = entry.pop("id")
+        if cls.partition_key and partition:
+            entry[cls.partition_key] = partition
+        return entry
+
+    @classmethod
+    def from_item(cls, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Deserialize a DynamoDB item into entity fields"""
+        fields = DatabaseManager.from_decimals(item)
+        if cls.id_key != "id" and cls.id_key in fields:
+            fields["id"] = fields.pop(cls.id_key)
+        return fields
+
+    @classmethod
+    def key(cls, id: str) -> Dict[str, Any]:
+        """Primary key of an entity"""
+        return {cls.id_key: id}
+
+    @classmethod
+    def projection(cls, attributes: List[str]) -> Dict[str, Any]:
+        """Request parameters reading only the given entity fields"""
+        return {
+            "ProjectionExpression": ", ".join(f"#{a}" for a in attributes),
+            "ExpressionAttributeNames": {
+                f"#{a}": cls.id_key if a == "id" else a for a in attributes
+            },
+        }
+
+    @classmethod
+    def put_request(cls, entity: T, partition: Optional[str] = None) -> Dict[str, Any]:
+        """Build a Put request for DatabaseManager.transact_write"""
+        return {
+            "Put": {
+                "TableName": cls.get_table().name,
+                "Item": cls.to_item(entity, partition),
+            }
+        }
+
+    @classmethod
+    def delete_request(cls, id: str, partition: Optional[str] = None) -> Dict[str, Any]:
+        """Build a partition-guarded Delete for DatabaseManager.transact_write"""
+        request: Dict[str, Any] = {
+            "TableName": cls.get_table().name,
+            "Key": cls.key(id),
+        }
+        if cls.partition_key:
+            request["ConditionExpression"] = "#pk = :pk"
+            request["ExpressionAttributeNames"] = {"#pk": cls.partition_key}
+            request["ExpressionAttributeValues"] = {":pk": partition}
+        return {"Delete": request}
+
     @classmethod
     def create(cls, entity: T, partition: Optional[str] = None) -> bool:
         try:
-            entry = DatabaseManager.to_decimals(entity.model_dump(exclude_none=True))
-            if cls.partition_key and partition:
-                entry[cls.partition_key] = partition
+            entry = cls.to_item(entity, partition)
             cls.get_table().put_item(Item=entry)
-            logger.info(f"Created {cls.name} {entity.id}")
+            logger.info("Created %s %s", cls.name, entity.id)
             return True
 
         except Exception as e:
-            logger.error(f"Failed to create {cls.name} {entity.id}: {e}")
+            logger.error("Failed to create %s %s: %s", cls.name, entity.id, e)
 
         return False
 
     @classmethod
     def read(cls, id: str, partition: Optional[str] = None) -> Optional[T]:
         try:
-            response = cls.get_table().get_item(Key={"id": id})
+            response = cls.get_table().get_item(Key=cls.key(id))
             item = response["Item"]  # type: ignore
             if cls.partition_key and item.get(cls.partition_key) != partition:
                 raise ClientError(
                     {"Error": {"Code": "ConditionalCheckFailedException"}},
                     "GetItem",
                 )
-            return cls.schema(**DatabaseManager.from_decimals(item))
+            return cls.schema(**cls.from_item(item))
 
         except ClientError as e:
             code = e.response.get("Error", {}).get("Code")
             if code == "ConditionalCheckFailedException":
-                logger.error(f"Access denied for {cls.name} {id}")
+                logger.error("Access denied for %s %s", cls.name, id)
             else:
-                logger.error(f"Failed to get {cls.name} {id}: {e}")
+                logger.error("Failed to get %s %s: %s", cls.name, id, e)
         except Exception as e:
-            logger.error(f"Failed to get {cls.name} {id}: {e}")
+            logger.error("Failed to get %s %s: %s", cls.name, id, e)
 
         return None
 
     @classmethod
-    def update(cls, entity: T, partition: Optional[str] = None) -> bool:
+    def exists(cls, id: str, partition: Optional[str] = None) -> bool:
+        """Check an entity exists (and matches its partition) without reading it"""
         try:
-            data = entity.model_dump(exclude_none=True).items()
-            data = {k: v for k, v in data if k in cls.modifiable}
-            if not data:
-                logger.warning(f"Left {cls.name} {entity.id} unchanged")
+            params: Dict[str, Any] = {"Key": cls.key(id)}
+            if cls.partition_key:
+                params["ProjectionExpression"] = "#pk"
+                params["ExpressionAttributeNames"] = {"#pk": cls.partition_key}
+            else:
+                params["ProjectionExpression"] = "#id"
+                params["ExpressionAttributeNames"] = {"#id": cls.id_key}
+            item = cls.get_table().get_item(**params).get("Item")
+            if item is None:
                 return False
+            return not cls.partition_key or item.get(cls.partition_key) == partition
+
+        except Exception as e:
+            logger.error("Failed to check %s %s: %s", cls.name, id, e)
+
+        return False
 
-            update_expression = "SET updated_at = :updated_at"
-            update_expression += "".join(f", #{k} = :{k}" for k in data)
+    @classmethod
+    def update(cls, entity: T, partition: Optional[str] = None) -> Optional[T]:
+        """Conditionally update modifiable fields, returning the updated entity"""
+        try:
+            # Only modifiable fields are serialized; the rest are never written
+            data = entity.model_dump(
+                include=set(cls.modifiable), exclude_unset=True, exclude_none=True
+            )
+            if not data:
+                logger.warning("Left %s %s unchanged", cls.name, entity.id)
+                return None
+
+            update_expression = ", ".join(
+                ["SET updated_at = :updated_at", *(f"#{k} = :{k}" for k in data)]
+            )
             expression_attribute_names = {f"#{k}": k for k in data}
-            expression_attribute_values = {f":{k}": v for k, v in data.items()}
+            expression_attribute_values = {
+                f":{k}": DatabaseManager.to_decimals(v) for k, v in data.items()
+            }
             expression_attribute_values[":updated_at"] = current_timestamp()
 
             params: Dict[str, Any] = dict(
-                Key={"id": entity.id},
+                Key=cls.key(entity.id),
                 UpdateExpression=update_expression,
                 ExpressionAttributeNames=expression_attribute_names,
                 ExpressionAttributeValues=expression_attribute_values,
+                ReturnValues="ALL_NEW",
             )
             if cls.partition_key:
                 params["ConditionExpression"] = Attr(cls.partition_key).eq(partition)
 
-            cls.get_table().update_item(**params)
-            logger.info(f"Updated {cls.name} {entity.id}")
-            return True
+            response = cls.get_table().update_item(**params)
+            logger.info("Updated %s %s", cls.name, entity.id)
+            return cls.schema(**cls.from_item(response["Attributes"]))
 
         except ClientError as e:
             code = e.response.get("Error", {}).get("Code")
             if code == "ConditionalCheckFailedException":
-                logger.error(f"Access denied for {cls.name} {entity.id}")
+                logger.error("Access denied for %s %s", cls.name, entity.id)
             else:
-                logger.error(f"Failed to update {cls.name} {entity.id}: {e}")
+                logger.error("Failed to update %s %s: %s", cls.name, entity.id, e)
         except Exception as e:
-            logger.error(f"Failed to update {cls.name} {entity.id}: {e}")
+            logger.error("Failed to update %s %s: %s", cls.name, entity.id, e)
 
-        return False
+        return None
 
     @classmethod
     def delete(cls, id: str, partition: Optional[str] = None) -> bool:
         try:
-            params: Dict[str, Any] = {"Key": {"id": id}}
+            params: Dict[str, Any] = {"Key": cls.key(id)}
             if cls.partition_key:
                 params["ConditionExpression"] = Attr(cls.partition_key).eq(partition)
             cls.get_table().delete_item(**params)
-            logger.info(f"Deleted {cls.name} {id}")
+            logger.info("Deleted %s %s", cls.name, id)
             return True
 
         except ClientError as e:
             code = e.response.get("Error", {}).get("Code")
             if code == "ConditionalCheckFailedException":
-                logger.error(f"Access denied for {cls.name} {id}")
+                logger.error("Access denied for %s %s", cls.name, id)
             else:
-                logger.error(f"Failed to delete {cls.name} {id}: {e}")
+                logger.error("Failed to delete %s %s: %s", cls.name, id, e)
         except Exception as e:
-            logger.error(f"Failed to delete {cls.name} {id}: {e}")
+            logger.error("Failed to delete %s %s: %s", cls.name, id, e)
 
         return False
 
@@ -201,41 +347,75 @@ class BaseRepository(Generic[T]):
     # Bulk CRUD methods
     # ================
 
+    @classmethod
+    def read_batch(cls, ids: List[str], partition: Optional[str] = None) -> List[T]:
+        """
+        Batch read entities (BatchGetItem, 100 keys per request) in id order
+
+        Ids that don't exist or belong to another partition are left out;
+        raises RuntimeError if the reads themselves fail, rather than
+        returning a silently truncated result
+        """
+        table = cls.get_table()
+        resource = DatabaseManager.get_dynamodb_resource()
+        items: Dict[str, Dict[str, Any]] = {}
+        try:
+            unique = list(dict.fromkeys(ids))
+            for start in range(0, len(unique), 100):
+                keys = [cls.key(id) for id in unique[start : start + 100]]
+                request = {table.name: {"Keys": keys}}
+                for attempt in range(5):
+                    response = resource.batch_get_item(RequestItems=request)
+                    for item in response["Responses"].get(table.name, []):
+                        items[item[cls.id_key]] = item
+                    request = response.get("UnprocessedKeys") or {}
+                    if not request:
+                        break
+                    time.sleep(0.05 * 2**attempt)  # back off on throttling
+                else:
+                    raise RuntimeError(f"Unprocessed {cls.name} keys after retries")
+
+        except Exception as e:
+            logger.error("Failed to batch get %ss: %s", cls.name, e)
+            raise RuntimeError(f"Failed to batch get {cls.name}s") from None
+
+        entities = []
+        for id in ids:
+            item = items.get(id)
+            if item is None:
+                continue
+            if cls.partition_key and item.get(cls.partition_key) != partition:
+                continue
+            entities.append(cls.schema(**cls.from_item(item)))
+        return entities
+
     @classmethod
     def create_batch(cls, entities: List[T], partition: Optional[str] = None) -> bool:
         """Batch create entities for a partition key"""
         try:
             with cls.get_table().batch_writer() as batch:
                 for entity in entities:
-                    entry = DatabaseManager.to_decimals(
-                        entity.model_dump(exclude_none=True)
-                    )
-                    if cls.partition_key and partition:
-                        entry[cls.partition_key] = partition
-                    batch.put_item(Item=entry)
-            logger.info(f"Batch created {len(entities)} {cls.name}s")
+                    batch.put_item(Item=cls.to_item(entity, partition))
+            logger.info("Batch created %s %ss", len(entities), cls.name)
             return True
 
         except Exception as e:
-            logger.error(f"Failed to batch create {cls.name}s: {e}")
+            logger.error("Failed to batch create %ss: %s", cls.name, e)
 
         return False
 
     @classmethod
-    def delete_batch(cls, entities: List[T], partition: Optional[str] = None) -> bool:
-        """Batch delete entities for a partition key"""
+    def delete_batch(cls, entities: List[T]) -> bool:
+        """Batch delete entities by primary key"""
         try:
             with cls.get_table().batch_writer() as batch:
                 for entity in entities:
-                    key: Dict[str, Any] = {"id": entity.id}
-                    if cls.partition_key:
-                        key[cls.partition_key] = partition
-                    batch.delete_item(Key=key)
-            logger.info(f"Batch deleted {len(entities)} {cls.name}s")
+                    batch.delete_item(Key=cls.key(entity.id))
+            logger.info("Batch deleted %s %ss", len(entities), cls.name)
             return True
 
         except Exception as e:
-            logger.error(f"Failed to batch delete {cls.name}s: {e}")
+            logger.error("Failed to batch delete %ss: %s", cls.name, e)
 
         return False
 
@@ -251,6 +431,45 @@ class BaseRepository(Generic[T]):
         last_key: Optional[str] = None,
     ) -> Tuple[List[T], Optional[str]]:
         """List entities for a partition key with pagination"""
+        items, next_key = cls._query_page(partition, limit, last_key)
+        return [cls.schema(**item) for item in items], next_key
+
+    @classmethod
+    def list_attributes(
+        cls,
+        partition: str,
+        attributes: List[str],
+        limit: int = 20,
+        last_key: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List only the given attributes as plain dicts, skipping validation"""
+        return cls._query_page(partition, limit, last_key, attributes)
+
+    @classmethod
+    def read_attributes(
+        cls, id: str, attributes: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Read only the given attributes of an entity as a plain dict"""
+        try:
+            response = cls.get_table().get_item(
+                Key=cls.key(id), **cls.projection(attributes)
+            )
+            item = response.get("Item")
+            return cls.from_item(item) if item is not None else None
+
+        except Exception as e:
+            logger.error("Failed to get %s %s: %s", cls.name, id, e)
+
+        return None
+
+    @classmethod
+    def _query_page(
+        cls,
+        partition: str,
+        limit: int,
+        last_key: Optional[str],
+        attributes: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
         if not cls.partition_key:
             raise NotImplementedError(f"list() not supported for {cls.name}") from None
 
@@ -261,25 +480,44 @@ class BaseRepository(Generic[T]):
                 "ScanIndexForward": False,  # newest first
                 "Limit": limit,
             }
+            if attributes:
+                params.update(cls.projection(attributes))
             if last_key:
-                params["ExclusiveStartKey"] = {"id": last_key}  # TODO: is this correct?
+                params["ExclusiveStartKey"] = cls.decode_cursor(last_key)
             response = cls.get_table().query(**params)
-            entities = [
-                cls.schema(**DatabaseManager.from_decimals(item))
-                for item in response["Items"]
-            ]
-            next_key = str(
-                response.get("LastEvaluatedKey", {}).get("id")
-            )  # TODO: is this correct?
-            return entities, next_key
+            items = [cls.from_item(item) for item in response["Items"]]
+            last_evaluated = response.get("LastEvaluatedKey")
+            next_key = cls.encode_cursor(last_evaluated) if last_evaluated else None
+            return items, next_key
 
         except Exception as e:
             logger.error(
-                f"Failed to list {cls.name}s for {cls.partition_key} {partition}: {e}"
+                "Failed to list %ss for %s %s: %s",
+                cls.name,
+                cls.partition_key,
+                partition,
+                e,
             )
 
         raise ValueError(f"Failed to list {cls.name}s") from None
 
+    @staticmethod
+    def encode_cursor(key: Dict[str, Any]) -> str:
+        """Encode a LastEvaluatedKey as an opaque pagination cursor"""
+        payload = orjson.dumps(DatabaseManager.from_decimals(key))
+        return base64.urlsafe_b64encode(payload).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Dict[str, Any]:
+        """Decode a pagination cursor back into an ExclusiveStartKey"""
+        try:
+            key = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except ValueError:
+            raise ValueError("Invalid pagination cursor") from None
+        if not isinstance(key, dict):
+            raise ValueError("Invalid pagination cursor") from None
+        return DatabaseManager.to_decimals(key)
+
     @classmethod
     def count(cls, partition: str) -> int:
         """Count total entities for a partition key"""
@@ -296,7 +534,11 @@ class BaseRepository(Generic[T]):
 
         except Exception as e:
             logger.error(
-                f"Failed to count {cls.name}s for {cls.partition_key} {partition}: {e}"
+                "Failed to count %ss for %s %s: %s",
+                cls.name,
+                cls.partition_key,
+                partition,
+                e,
             )
 
         raise ValueError(f"Failed to count {cls.name}s") from None
@@ -1,8 +1,16 @@
-from typing import List
+import logging
+from typing import Any, Dict, List, Optional
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from src.shared.utils import current_timestamp
 
 from src.shared.models import database as db
 from .base import BaseRepository, DatabaseManager
 
+logger = logging.getLogger()
+
 
 class Image(BaseRepository[db.Image]):
     """Repository for image operations using DynamoDB"""
@@ -41,11 +49,229 @@ class Report(BaseRepository[db.Report]):
     modifiable = ["title", "reference", "favorites"]
     partition_key = "author"  # Reports are grouped by their author
 
+    @classmethod
+    def _counter_key(cls, partition: str) -> Dict[str, Any]:
+        # Counter items carry no author, so they stay out of the author index
+        return {"id": f"{cls.name}Count#{partition}"}
+
+    @classmethod
+    def count(cls, partition: str) -> int:
+        """Count an author's reports from their counter item, seeding it if missing"""
+        try:
+            item = cls.get_table().get_item(Key=cls._counter_key(partition)).get("Item")
+            if item is not None:
+                return int(item["total"])
+        except Exception as e:
+            logger.error("Failed to read %s counter for %s: %s", cls.name, partition, e)
+            raise ValueError(f"Failed to count {cls.name}s") from None
+
+        return cls._seed_count(partition)
+
+    @classmethod
+    def _seed_count(cls, partition: str) -> int:
+        """Create an author's counter from their indexed reports"""
+        # Report writes only ADD to an existing counter (see count_request), so
+        # no report can be committed uncounted between the query and the put
+        total = super().count(partition)
+        try:
+            cls.get_table().put_item(
+                Item={**cls._counter_key(partition), "total": total},
+                ConditionExpression=Attr("id").not_exists(),
+            )
+            return total
+
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code != "ConditionalCheckFailedException":
+                logger.error("Failed to seed %s counter: %s", cls.name, e)
+                raise ValueError(f"Failed to count {cls.name}s") from None
+
+        # Seeded concurrently; that counter is authoritative
+        item = cls.get_table().get_item(
+            Key=cls._counter_key(partition), ConsistentRead=True
+        )["Item"]
+        return int(item["total"])
+
+    @classmethod
+    def count_request(cls, partition: str, delta: int) -> Dict[str, Any]:
+        """Build an Update adding delta to an author's (existing) report counter"""
+        return {
+            "Update": {
+                "TableName": cls.get_table().name,
+                "Key": cls._counter_key(partition),
+                "UpdateExpression": "ADD #total :delta",
+                "ConditionExpression": "attribute_exists(#total)",
+                "ExpressionAttributeNames": {"#total": "total"},
+                "ExpressionAttributeValues": {":delta": delta},
+            }
+        }
+
+    @classmethod
+    def read_favorites(cls, id: str, partition: str) -> Optional[List[str]]:
+        """Read only the favorites of a report (None if missing or not owned)"""
+        try:
+            item = (
+                cls.get_table()
+                .get_item(
+                    Key={"id": id},
+                    ProjectionExpression="#pk, favorites",
+                    ExpressionAttributeNames={"#pk": cls.partition_key},
+                )
+                .get("Item")
+            )
+            if item is None or item.get(cls.partition_key) != partition:
+                return None
+            return list(item.get("favorites") or [])
+
+        except Exception as e:
+            logger.error("Failed to get favorites of %s %s: %s", cls.name, id, e)
+
+        return None
+
     @classmethod
     def update_favorites(cls, id: str, partition: str, favorites: List[str]) -> bool:
         """Update only the favorites field of a report"""
-        report = cls.schema(id=id, author=partition, favorites=favorites)
-        return cls.update(report)
+        if favorites:
+            report = cls.schema(id=id, author=partition, favorites=favorites)
+            return cls.update(report, partition) is not None
+
+        # Favorites can't be stored empty, so clearing drops the attribute
+        try:
+            cls.get_table().update_item(
+                Key={"id": id},
+                UpdateExpression="REMOVE favorites SET updated_at = :updated_at",
+                ConditionExpression=Attr(cls.partition_key).eq(partition),
+                ExpressionAttributeValues={":updated_at": current_timestamp()},
+            )
+            logger.info("Cleared favorites of %s %s", cls.name, id)
+            return True
+
+        except Exception as e:
+            logger.error("Failed to clear favorites of %s %s: %s", cls.name, id, e)
+
+        return False
+
+    @classmethod
+    def add_favorite(cls, id: str, partition: str, product: str) -> bool:
+        """Append a product to a report's favorites in one conditional write"""
+        try:
+            cls.get_table().update_item(
+                Key={"id": id},
+                UpdateExpression=(
+                    "SET favorites = list_append(if_not_exists(favorites, :empty), "
+                    ":product), updated_at = :updated_at"
+                ),
+                ConditionExpression=Attr(cls.partition_key).eq(partition)
+                & ~Attr("favorites").contains(product),
+                ExpressionAttributeValues={
+                    ":empty": [],
+                    ":product": [product],
+                    ":updated_at": current_timestamp(),
+                },
+            )
+            logger.info("Added favorite %s to %s %s", product, cls.name, id)
+            return True
+
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code == "ConditionalCheckFailedException":
+                # Either already a favorite (no-op) or not the author's report
+                return cls.exists(id, partition)
+            logger.error("Failed to add favorite to %s %s: %s", cls.name, id, e)
+        except Exception as e:
+            logger.error("Failed to add favorite to %s %s: %s", cls.name, id, e)
+
+        return False
+
+    @classmethod
+    def remove_favorite(
+        cls, id: str, partition: str, product: str, attempts: int = 3
+    ) -> Optional[bool]:
+        """
+        Remove a product from a report's favorites, guarded against races
+
+        The product's index is read first and the removal is conditioned on it
+        still being there, retrying when concurrent edits shift the list.
+
+        Returns:
+            True once removed (or absent), None if the report is missing or not
+            owned, False if the favorites kept changing on every attempt
+        """
+        for _ in range(attempts):
+            favorites = cls.read_favorites(id, partition)
+            if favorites is None:
+                return None
+            try:
+                index = favorites.index(product)
+            except ValueError:
+                return True
+
+            # Favorites can't be stored empty, so drop the attribute with the
+            # last one (only if nothing was appended meanwhile)
+            condition = Attr(cls.partition_key).eq(partition) & Attr(
+                f"favorites[{index}]"
+            ).eq(product)
+            if len(favorites) == 1:
+                target = "favorites"
+                condition &= Attr("favorites").size().eq(1)
+            else:
+                target = f"favorites[{index}]"
+            try:
+                cls.get_table().update_item(
+                    Key={"id": id},
+                    UpdateExpression=f"REMOVE {target} SET updated_at = :updated_at",
+                    ConditionExpression=condition,
+                    ExpressionAttributeValues={":updated_at": current_timestamp()},
+                )
+                logger.info("Removed favorite %s from %s %s", product, cls.name, id)
+                return True
+
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code != "ConditionalCheckFailedException":
+                    logger.error(
+                        "Failed to remove favorite from %s %s: %s", cls.name, id, e
+                    )
+                    raise
+
+        logger.warning("Gave up removing favorite from %s %s", cls.name, id)
+        return False
+
+
+class Embedding(BaseRepository[db.Embedding]):
+    """Repository for product embedding operations using DynamoDB"""
+
+    name = "Embedding"
+    schema = db.Embedding
+    get_table = DatabaseManager.get_embeddings_table
+    modifiable = ["vector", "scale", "dtype"]
+    partition_key = "model_version"  # Embeddings are grouped by their model version
+    id_key = "product_id"  # Key schema of the existing embeddings table
+
+    @classmethod
+    def list_by_model(cls, model: str) -> List[db.Embedding]:
+        """Read all embeddings for a model version in one paginated query"""
+        # Only fetch what decoding needs; response parsing cost scales with attributes
+        params: Dict[str, Any] = {
+            "IndexName": "ModelVersionIndex",
+            "KeyConditionExpression": Key(cls.partition_key).eq(model),
+            **cls.projection(["id", "vector", "scale", "dtype"]),
+        }
+        items = []
+        while True:
+            response = cls.get_table().query(**params)
+            items.extend(response["Items"])
+            if "LastEvaluatedKey" not in response:
+                break
+            params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+        # Items were validated when written; the vector bytes dominate validation
+        # cost. Items from before binary vectors are skipped so they get recomputed
+        return [
+            cls.schema.model_construct(model_version=model, **cls.from_item(item))
+            for item in items
+            if "vector" in item
+        ]
 
 
 class User(BaseRepository[db.User]):
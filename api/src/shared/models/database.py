@@ -97,10 +97,12 @@ class Product(BaseEntity):
         """Format database.Product into REST API response"""
         from src.shared.database import repository
 
-        images = [repository.Image.read(img, self.id) for img in self.images]
-        if any(img is None for img in images):
+        # The basic (list view) format only shows the first image
+        ids = self.images[:1] if basic else self.images
+        images = repository.Image.read_batch(ids, self.id)
+        if len(images) != len(ids):
             raise LookupError(f"Images for product {self.id} not found")
-        images = [img.to_api() for img in images if img is not None]
+        images = [img.to_api() for img in images]
 
         if basic:
             return images[0]
@@ -137,7 +139,8 @@ class Report(BaseEntity):
         if reference is None:
             raise LookupError(f"Reference {self.reference} not found")
 
-        return response.Report(
+        # Fields come straight from validated DB models, so skip re-validation
+        return response.Report.model_construct(
             id=self.id,
             title=self.title,
             author=self.author,
@@ -146,6 +149,17 @@ class Report(BaseEntity):
         )
 
 
+class Embedding(BaseEntity):
+    """Database Embedding model for DynamoDB storage (id is the product id)"""
+
+    vector: bytes  # Raw vector bytes (int8 quantized or float32)
+    scale: float = 1.0  # Dequantization scale
+    dtype: str = "int8"  # NumPy dtype of vector
+    model_version: str  # Model version that computed the embedding
+    created_at: str = Field(default_factory=current_timestamp)
+    updated_at: Optional[str] = None
+
+
 class User(BaseEntity):
     """Database User model for DynamoDB storage"""
 
@@ -103,7 +103,7 @@ class Product(BaseSchema):
             brand=self.brand,
             series=self.series,
             model=self.model,
-            images=[img.image for img in self.images],
+            images=[img.id for img in images],
             category=(
                 self.category.to_db()
                 if self.category is not None
@@ -145,6 +145,20 @@ class Report(BaseSchema):
         )
 
 
+class Search(BaseSchema):
+    """Request product Search model from REST API"""
+
+    class Filters(BaseSchema):
+        category: Optional[Product.Category] = None
+        brand: Optional[str] = None
+        priceRange: Optional[Dict[str, float]] = None  # { min?: number; max?: number }
+        similarity: Optional[Dict[str, float]] = None  # { threshold?: number }
+
+    filters: Filters
+    page: Optional[int] = None
+    limit: Optional[int] = None
+
+
 class User(BaseSchema):
     """Request User model from REST API"""
 
@@ -56,6 +56,15 @@ class Report(BaseEntity):
     favorites: Optional[List[str]] = Field(None, min_length=1)
 
 
+class SearchResults(BaseSchema):
+    """Response product Search Results model for REST API"""
+
+    products: List[Product]
+    total: int
+    page: int
+    limit: int
+
+
 class User(BaseEntity):
     """Response User model for REST API"""
 
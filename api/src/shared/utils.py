@@ -2,12 +2,18 @@
 Shared utilities for K9 API Lambda functions
 """
 
-import json
+import base64
+import io
 import logging
+import os
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from functools import wraps
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
 import boto3
+import orjson
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from .models import request
@@ -15,11 +21,27 @@ from .models import request
 
 # Configure logging
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger.setLevel(os.environ.get("LOG_LEVEL", "WARNING"))
+
+# Shared client configuration: keep pooled connections alive across warm
+# invocations and leave room for the parallel S3 / DynamoDB work in handlers
+boto_config = Config(
+    max_pool_connections=16,
+    tcp_keepalive=True,
+    retries={"max_attempts": 3, "mode": "standard"},
+)
 
 # AWS clients
-s3_client = boto3.client("s3")
-lambda_client = boto3.client("lambda")
+s3_client = boto3.client("s3", config=boto_config)
+lambda_client = boto3.client("lambda", config=boto_config)
+
+# Multipart uploads with parallel part transfers for large objects
+s3_transfer_config = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+    use_threads=True,
+)
 
 
 def generate_id() -> str:
@@ -32,6 +54,16 @@ def current_timestamp() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+# Numpy arrays and naive datetimes serialize natively instead of via default=str
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+)
+
+# Request bodies are stored close to verbatim, so keep them well under
+# DynamoDB's 400 KB item limit
+MAX_BODY_BYTES = int(os.environ.get("MAX_BODY_BYTES", str(256 * 1024)))
+
+
 def lambda_response(
     status_code: int, body: Any, headers: Optional[Dict[str, str]] = None
 ) -> Dict[str, Any]:
@@ -49,7 +81,11 @@ def lambda_response(
     return {
         "statusCode": status_code,
         "headers": default_headers,
-        "body": json.dumps(body, default=str) if not isinstance(body, str) else body,
+        "body": (
+            orjson.dumps(body, default=str, option=ORJSON_OPTIONS).decode()
+            if not isinstance(body, str)
+            else body
+        ),
     }
 
 
@@ -77,16 +113,47 @@ def error_response(
     return lambda_response(status_code, response_body)
 
 
+def api_handler(failure_message: str) -> Callable[[Callable], Callable]:
+    """Decorator mapping handler exceptions to API error responses"""
+
+    def decorator(handler_func: Callable) -> Callable:
+        @wraps(handler_func)
+        def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            try:
+                return handler_func(event, context)
+            except ValueError as e:
+                return error_response(str(e), 400)
+            except Exception as e:
+                logger.error("Error in %s: %s", handler_func.__name__, e)
+                return error_response(failure_message, 500)
+
+        return wrapper
+
+    return decorator
+
+
 def parse_json_body(event: Dict[str, Any]) -> Dict[str, Any]:
-    """Parse JSON body from Lambda event"""
-    try:
-        body = event.get("body", "{}")
-        if isinstance(body, str):
-            return json.loads(body)
+    """Parse a size-limited JSON object body from Lambda event"""
+    body = event.get("body") or "{}"
+    if not isinstance(body, str):
         return body
-    except json.JSONDecodeError as e:
+
+    # Checked before decoding so oversized payloads are never parsed
+    if len(body) > MAX_BODY_BYTES * (4 / 3 if event.get("isBase64Encoded") else 1):
+        raise ValueError("Request body too large")
+
+    try:
+        if event.get("isBase64Encoded"):
+            parsed = orjson.loads(base64.b64decode(body))
+        else:
+            parsed = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Invalid JSON in request body: {e}")
 
+    if not isinstance(parsed, dict):
+        raise ValueError("Request body must be a JSON object")
+    return parsed
+
 
 def get_path_parameter(event: Dict[str, Any], param_name: str) -> str:
     """Extract path parameter from Lambda event"""
@@ -109,6 +176,16 @@ def get_query_parameter(
 
 def get_user_from_event(event: Dict[str, Any]) -> request.User:
     """Extract user information from authenticated Lambda event"""
+    # require_auth has already verified the token and attached its claims
+    user = event.get("user")
+    if user is not None:
+        return request.User.model_construct(
+            id=user["user_id"],
+            username=user.get("username"),
+            email=user.get("email"),
+            name=user.get("name"),
+        )
+
     # After API Gateway Cognito authorization, user info is available in requestContext
     request_context = event.get("requestContext", {})
     authorizer = request_context.get("authorizer", {})
@@ -125,19 +202,26 @@ def get_user_from_event(event: Dict[str, Any]) -> request.User:
     raise ValueError("User information not found in request context")
 
 
+# Preflight responses never vary, so serialize the response once per container
+CORS_PREFLIGHT_RESPONSE = lambda_response(
+    200,
+    "",
+    {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type,Authorization,X-Requested-With",
+        "Access-Control-Allow-Methods": "GET,POST,PUT,PATCH,DELETE,OPTIONS",
+        "Access-Control-Max-Age": "86400",
+    },
+)
+
+
 def handle_cors_preflight(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Handle CORS preflight requests"""
     if event.get("httpMethod") == "OPTIONS":
-        return lambda_response(
-            200,
-            "",
-            {
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type,Authorization,X-Requested-With",
-                "Access-Control-Allow-Methods": "GET,POST,PUT,PATCH,DELETE,OPTIONS",
-                "Access-Control-Max-Age": "86400",
-            },
-        )
+        # Copied so callers adjusting headers can't alter later responses
+        response = dict(CORS_PREFLIGHT_RESPONSE)
+        response["headers"] = dict(response["headers"])
+        return response
     return None
 
 
@@ -147,11 +231,11 @@ def invoke_lambda_async(function_name: str, payload: Dict[str, Any]) -> None:
         lambda_client.invoke(
             FunctionName=function_name,
             InvocationType="Event",  # Async invocation
-            Payload=json.dumps(payload),
+            Payload=orjson.dumps(payload),
         )
-        logger.info(f"Successfully invoked {function_name} asynchronously")
+        logger.info("Successfully invoked %s asynchronously", function_name)
     except ClientError as e:
-        logger.error(f"Failed to invoke {function_name}: {e}")
+        logger.error("Failed to invoke %s: %s", function_name, e)
         raise
 
 
@@ -163,10 +247,32 @@ def upload_to_s3(
         s3_client.put_object(
             Bucket=bucket, Key=key, Body=data, ContentType=content_type
         )
-        logger.info(f"Successfully uploaded to s3://{bucket}/{key}")
+        logger.info("Successfully uploaded to s3://%s/%s", bucket, key)
+        return key
+    except ClientError as e:
+        logger.error("Failed to upload to S3: %s", e)
+        raise
+
+
+def upload_fileobj_to_s3(
+    bucket: str,
+    key: str,
+    fileobj: BinaryIO,
+    content_type: str = "application/octet-stream",
+) -> str:
+    """Upload a file object to S3 (multipart for large objects) and return the key"""
+    try:
+        s3_client.upload_fileobj(
+            fileobj,
+            bucket,
+            key,
+            ExtraArgs={"ContentType": content_type},
+            Config=s3_transfer_config,
+        )
+        logger.info("Successfully uploaded to s3://%s/%s", bucket, key)
         return key
     except ClientError as e:
-        logger.error(f"Failed to upload to S3: {e}")
+        logger.error("Failed to upload to S3: %s", e)
         raise
 
 
@@ -178,10 +284,92 @@ def download_from_s3(bucket: str, key: str) -> bytes:
     except ClientError as e:
         if e.response.get("Error", {}).get("Code") == "NoSuchKey":
             raise FileNotFoundError(f"Object not found: s3://{bucket}/{key}")
-        logger.error(f"Failed to download from S3: {e}")
+        logger.error("Failed to download from S3: %s", e)
         raise
 
 
+class S3MultipartWriter(io.RawIOBase):
+    """Write-only stream that uploads to S3 in multipart chunks as data arrives"""
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        content_type: str = "application/octet-stream",
+        part_size: int = 8 * 1024 * 1024,
+    ):
+        super().__init__()
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._parts: List[Dict[str, Any]] = []
+        self._upload_id = s3_client.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type
+        )["UploadId"]
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def _upload_part(self, data: bytes) -> None:
+        number = len(self._parts) + 1
+        response = s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=data,
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+    def close(self) -> None:
+        """Upload the remaining buffer and complete the upload"""
+        if self.closed:
+            return
+        try:
+            if self._buffer or not self._parts:
+                self._upload_part(bytes(self._buffer))
+                self._buffer.clear()
+            s3_client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+            logger.info("Successfully uploaded to s3://%s/%s", self.bucket, self.key)
+        finally:
+            super().close()
+
+    def abort(self) -> None:
+        """Discard the uploaded parts without creating the object"""
+        if self.closed:
+            return
+        try:
+            s3_client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+        except ClientError as e:
+            # Don't mask the original error; the bucket lifecycle rule cleans
+            # up incomplete uploads
+            logger.error("Failed to abort multipart upload: %s", e)
+        finally:
+            super().close()
+
+
+def generate_presigned_url(bucket: str, key: str, expires_in: int = 3600) -> str:
+    """Generate a presigned GET URL for an S3 object"""
+    return s3_client.generate_presigned_url(
+        "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=expires_in
+    )
+
+
 def validate_required_fields(data: Dict[str, Any], required_fields: list) -> None:
     """Validate that required fields are present in data"""
     missing_fields = [field for field in required_fields if data.get(field) is None]
@@ -195,20 +383,24 @@ class AWSConfig:
     @staticmethod
     def get_similarity_bucket() -> str:
         """Get the S3 bucket for similarity matrices"""
-        import os
-
         return os.environ.get("SIMILARITY_BUCKET", "k9-similarity-matrices")
 
+    @staticmethod
+    def get_images_bucket() -> str:
+        """Get the S3 bucket for product images"""
+        return os.environ.get("IMAGES_BUCKET", "k9-images")
+
+    @staticmethod
+    def get_exports_bucket() -> str:
+        """Get the S3 bucket for favorites exports"""
+        return os.environ.get("EXPORTS_BUCKET", "k9-exports")
+
     @staticmethod
     def get_embeddings_function_name() -> str:
         """Get the embeddings Lambda function name"""
-        import os
-
         return os.environ.get("EMBEDDINGS_FUNCTION_NAME", "k9-embeddings-dev")
 
     @staticmethod
     def get_environment() -> str:
         """Get the current environment"""
-        import os
-
         return os.environ.get("ENVIRONMENT", "dev")